@@ -0,0 +1,9 @@
+"""
+Benchmarks of the Visual Genome Python API wrapper.
+
+    synthetic      deterministic synthetic dataset at any scale
+    loaders        time and memory of the local loaders, against a baseline
+    models_memory  memory saved by the slotted models, against the
+                   pre-slots classes in unslotted_models
+    json_backends  decoding throughput of each JSON backend
+"""
@@ -0,0 +1,114 @@
+"""
+Decoding throughput of each installed JSON backend.
+
+Decodes every dump file of a data directory, and the `by-id/` scene graphs
+one by one, with every backend `visual_genome.jsonlib` can use, and reports
+megabytes per second (best of `--repeat`). The files are read into memory
+first, so only decoding is timed. The streaming reader used by the local
+loaders, which always runs on the standard library, is timed as well for
+comparison.
+
+    python -m benchmarks.json_backends --data-dir bench-data/
+"""
+import argparse
+import io
+import json
+import os
+import time
+
+import visual_genome.utils as utils
+from visual_genome import jsonlib
+from benchmarks import synthetic
+
+DUMP_FILES = ('image_data.json', 'region_descriptions.json',
+              'question_answers.json', 'scene_graphs.json', 'attributes.json',
+              'synsets.json')
+
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _read_by_id(data_dir):
+    by_id_dir = os.path.join(data_dir, 'by-id')
+    if not os.path.isdir(by_id_dir):
+        return []
+    contents = []
+    for fname in sorted(os.listdir(by_id_dir)):
+        if fname.endswith('.json') and fname[:-5].isdigit():
+            with open(os.path.join(by_id_dir, fname), 'rb') as f:
+                contents.append(f.read())
+    return contents
+
+
+def run(data_dir, repeat=3):
+    """
+    Get {file: {backend: megabytes per second}} for the dumps of
+    `data_dir`, 'by-id/' and the streaming reader.
+    """
+    previous = jsonlib.get_backend()
+    results = {}
+    try:
+        inputs = []
+        for name in DUMP_FILES:
+            path = os.path.join(data_dir, name)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    inputs.append((name, [f.read()]))
+        by_id = _read_by_id(data_dir)
+        if by_id:
+            inputs.append(('by-id/', by_id))
+
+        for name, contents in inputs:
+            megabytes = sum(len(c) for c in contents) / 2.0 ** 20
+            results[name] = {}
+            for backend in jsonlib.available_backends():
+                jsonlib.set_backend(backend)
+                seconds = best_time(
+                    lambda: [jsonlib.loads(c) for c in contents], repeat)
+                results[name][backend] = megabytes / seconds
+            if len(contents) == 1 and contents[0][:1] == b'[':
+                text = contents[0].decode('utf-8')
+                seconds = best_time(lambda: sum(
+                    1 for _ in utils.iter_json_array(io.StringIO(text))),
+                    repeat)
+                results[name]['json (streaming)'] = megabytes / seconds
+    finally:
+        jsonlib.set_backend(previous)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--data-dir', default='bench-data/')
+    parser.add_argument('--images', type=int, default=1000,
+                        help='images to generate if --data-dir has no data')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write the results to this file')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.data_dir, 'image_data.json')):
+        synthetic.generate(args.data_dir, images=args.images)
+
+    results = run(args.data_dir, args.repeat)
+    backends = []
+    for speeds in results.values():
+        backends.extend(b for b in speeds if b not in backends)
+    print('%-28s' % 'MB/s' + ''.join('%18s' % b for b in backends))
+    for name, speeds in results.items():
+        print('%-28s' % name + ''.join(
+            '%18.1f' % speeds[b] if b in speeds else '%18s' % '-'
+            for b in backends))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Time and memory of the local loaders.
+
+Runs each loader on a data directory (synthetic data is generated into it
+first if it has no `image_data.json`), keeps the best wall time of
+`--repeat` runs and the peak memory traced during one more run, and writes
+the results as JSON. With `--baseline`, compares them against an earlier
+results file and exits with status 1 if any loader got slower or bigger by
+more than `--threshold`.
+
+    python -m benchmarks.loaders --images 2000 --output results.json
+    python -m benchmarks.loaders --baseline results.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import visual_genome.local as local
+from benchmarks import synthetic
+
+
+def reset_caches():
+    """
+    Forget the catalogs, dump indexes and synsets the loaders share, so
+    every run pays for them.
+    """
+    local._image_catalogs.clear()
+    local._dump_indexes.clear()
+    local._synset_registry.clear()
+
+
+def _load_records(data_dir):
+    by_id_dir = os.path.join(data_dir, 'by-id')
+    records = []
+    for image_id in local.get_scene_graph_ids(by_id_dir):
+        with open(os.path.join(by_id_dir, '%d.json' % image_id), 'r') as f:
+            records.append(json.load(f))
+    return records
+
+
+def _parse_graphs(data_dir):
+    images = local.get_image_catalog(data_dir)
+    return [local.parse_graph_local(record, images[record['image_id']])
+            for record in _load_records(data_dir)]
+
+
+def _setup_parse_graph_local(data_dir):
+    images = local.get_image_catalog(data_dir)
+    return [(record, images[record['image_id']])
+            for record in _load_records(data_dir)]
+
+
+def _setup_init_synsets(data_dir):
+    graphs = _parse_graphs(data_dir)
+    reset_caches()
+    return graphs
+
+
+# name -> (setup, run). `setup(data_dir)` is not measured; its result is
+# passed to `run(data_dir, state)`, which returns the loaded items.
+BENCHMARKS = {
+    'get_all_image_data': (
+        None, lambda d, _: local.get_all_image_data(d)),
+    'get_all_region_descriptions': (
+        None, lambda d, _: local.get_all_region_descriptions(d)),
+    'get_all_qas': (
+        None, lambda d, _: local.get_all_qas(d)),
+    'get_scene_graphs': (
+        None, lambda d, _: local.get_scene_graphs(
+            data_dir=d, image_data_dir=os.path.join(d, 'by-id'),
+            max_rels=sys.maxsize)),
+    'parse_graph_local': (
+        _setup_parse_graph_local,
+        lambda d, pairs: [local.parse_graph_local(record, image)
+                          for record, image in pairs]),
+    'init_synsets': (
+        _setup_init_synsets,
+        lambda d, graphs: [local.init_synsets(
+            graph, os.path.join(d, 'synsets.json')) for graph in graphs]),
+}
+
+
+def _prepare(setup, data_dir):
+    reset_caches()
+    state = setup(data_dir) if setup is not None else None
+    gc.collect()
+    return state
+
+
+def run_benchmark(name, data_dir, repeat=3):
+    """
+    Get the best and mean seconds of `repeat` runs of the loader `name`,
+    the peak bytes traced while it ran and the number of items it loaded.
+    """
+    setup, run = BENCHMARKS[name]
+    times = []
+    for _ in range(repeat):
+        state = _prepare(setup, data_dir)
+        start = time.perf_counter()
+        items = run(data_dir, state)
+        times.append(time.perf_counter() - start)
+        del items, state
+
+    state = _prepare(setup, data_dir)
+    tracemalloc.start()
+    try:
+        items = run(data_dir, state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(times), 'mean_seconds': sum(times) / len(times),
+            'peak_bytes': peak, 'items': len(items)}
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Get [(name, metric, baseline value, value, ratio)] of the metrics in
+    `results` more than `threshold` (a fraction) above `baseline`.
+    """
+    regressions = []
+    for name, result in sorted(results['results'].items()):
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            if not old[metric]:
+                continue
+            ratio = float(result[metric]) / old[metric]
+            if ratio > 1 + threshold:
+                regressions.append((name, metric, old[metric],
+                                    result[metric], ratio))
+    return regressions
+
+
+def _print_results(results, baseline=None):
+    print('%-30s %10s %12s %10s' % ('loader', 'seconds', 'peak MB',
+                                    'items'))
+    for name, r in sorted(results['results'].items()):
+        line = '%-30s %10.4f %12.2f %10d' % (
+            name, r['seconds'], r['peak_bytes'] / 2.0 ** 20, r['items'])
+        old = baseline['results'].get(name) if baseline else None
+        if old:
+            line += '   time x%.2f, memory x%.2f' % (
+                r['seconds'] / max(old['seconds'], 1e-9),
+                float(r['peak_bytes']) / max(old['peak_bytes'], 1))
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--data-dir', default='bench-data/')
+    parser.add_argument('--images', type=int, default=1000,
+                        help='images to generate if --data-dir has no data')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS),
+                        help='loaders to run, all by default')
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--baseline', help='results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed slowdown or growth, as a fraction')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.data_dir, 'image_data.json')):
+        synthetic.generate(args.data_dir, images=args.images, seed=args.seed)
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'data_dir': args.data_dir,
+        'repeat': args.repeat,
+        'results': {},
+    }
+    for name in args.only or sorted(BENCHMARKS):
+        results['results'][name] = run_benchmark(name, args.data_dir,
+                                                 args.repeat)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    _print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, old, new, ratio in regressions:
+            print('REGRESSION %s %s: %s -> %s (x%.2f)'
+                  % (name, metric, old, new, ratio))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Memory held by the models after a full region descriptions load.
+
+Runs `local.get_all_region_descriptions` twice: with the slotted `Image` and
+`Region` models, and with the dict-backed classes the package had before
+they declared `__slots__` (kept in `benchmarks.unslotted_models`). Reports
+the memory traced for each load and the size of a single instance.
+
+    python -m benchmarks.models_memory --data-dir data/
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+
+import visual_genome.local as local
+import visual_genome.utils as utils
+from visual_genome.models import Image, Region
+from benchmarks import unslotted_models
+
+
+def instance_size(obj):
+    """
+    Bytes taken by `obj` itself, including its `__dict__` if it has one.
+    """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def measure(data_dir, image_cls, region_cls):
+    """
+    Load all region descriptions building `image_cls` and `region_cls`
+    instances, and return the number of regions, the bytes still allocated
+    by the load and the size of one region.
+    """
+    saved = utils.Image, utils.Region
+    utils.Image, utils.Region = image_cls, region_cls
+    try:
+        gc.collect()
+        tracemalloc.start()
+        images = {img.id: img for img in local.iter_image_data(data_dir)}
+        regions = local.get_all_region_descriptions(data_dir, images)
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        utils.Image, utils.Region = saved
+    n_regions = sum(len(image_regions) for image_regions in regions)
+    sample = next(r[0] for r in regions if r)
+    return {'regions': n_regions, 'bytes': current,
+            'region_size': instance_size(sample),
+            'image_size': instance_size(sample.image)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--data-dir', default='data/',
+                        help='directory with image_data.json and '
+                             'region_descriptions.json')
+    args = parser.parse_args(argv)
+
+    slotted = measure(args.data_dir, Image, Region)
+    with_dict = measure(args.data_dir, unslotted_models.Image,
+                        unslotted_models.Region)
+    saved = with_dict['bytes'] - slotted['bytes']
+    report = {
+        'slots': slotted,
+        'dict': with_dict,
+        'saved_bytes': saved,
+        'saved_bytes_per_region': float(saved) / max(slotted['regions'], 1),
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Deterministic synthetic Visual Genome data.
+
+Writes the files the local loaders read, with the same layout and roughly
+the same per-image sizes as the real dataset, so the loaders can be timed
+at any scale without downloading it. The same arguments always produce the
+same files.
+
+    python -m benchmarks.synthetic --images 10000 --out-dir bench-data/
+"""
+import argparse
+import io
+import json
+import os
+import random
+
+OBJECT_NAMES = ['man', 'woman', 'person', 'shirt', 'tree', 'building',
+                'window', 'sign', 'car', 'table', 'plate', 'dog', 'horse',
+                'street', 'sky', 'cloud', 'grass', 'wall', 'head', 'hand']
+PREDICATES = ['on', 'has', 'wearing', 'of', 'in', 'near', 'behind',
+              'holding', 'riding', 'next to', 'ON', 'with']
+ATTRIBUTES = ['white', 'black', 'blue', 'green', 'red', 'brown', 'large',
+              'small', 'wooden', 'tall', 'standing', 'metal']
+QUESTION_WORDS = ['What', 'Where', 'When', 'Who', 'Why', 'How']
+
+
+def _synset(word, pos='n'):
+    return '%s.%s.01' % (word.replace(' ', '_'), pos)
+
+
+def _dump(path, data):
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data, ensure_ascii=False))
+
+
+def _box(rng, width, height):
+    x = rng.randint(0, width - 2)
+    y = rng.randint(0, height - 2)
+    return (x, y, rng.randint(1, width - x), rng.randint(1, height - y))
+
+
+def _image(rng, image_id):
+    width, height = rng.choice([(800, 600), (500, 375), (1024, 768),
+                                (640, 480), (600, 800)])
+    return {'image_id': image_id,
+            'url': 'https://cs.stanford.edu/people/rak248/VG_100K/%d.jpg'
+                   % image_id,
+            'width': width, 'height': height,
+            'coco_id': rng.randint(1, 600000) if rng.random() < 0.4
+            else None,
+            'flickr_id': rng.randint(1, 10 ** 10) if rng.random() < 0.8
+            else None}
+
+
+def _around(rng, mean):
+    """
+    A count spread around `mean`, never negative.
+    """
+    return max(int(rng.gauss(mean, mean / 3.0)), 0) if mean else 0
+
+
+def generate(out_dir, images=1000, regions=50, objects=35,
+             relationships=21, qas=17, seed=0):
+    """
+    Write `image_data.json`, `region_descriptions.json`,
+    `question_answers.json`, `synsets.json`, `scene_graphs.json`,
+    `attributes.json` and the `by-id/` scene graphs (with their attributes
+    merged in) of `images` images to `out_dir`. The other arguments are the
+    average number of each item per image.
+    """
+    rng = random.Random(seed)
+    by_id_dir = os.path.join(out_dir, 'by-id')
+    if not os.path.exists(by_id_dir):
+        os.makedirs(by_id_dir)
+
+    synsets = sorted(set([_synset(w) for w in OBJECT_NAMES] +
+                         [_synset(w, 'v') for w in PREDICATES] +
+                         [_synset(w, 's') for w in ATTRIBUTES]))
+    _dump(os.path.join(out_dir, 'synsets.json'),
+          [{'synset_name': name, 'synset_definition': 'definition of ' + name}
+           for name in synsets])
+
+    image_data = []
+    region_data = []
+    qa_data = []
+    scene_graphs = []
+    attribute_data = []
+    region_id = qa_id = object_id = relationship_id = attribute_id = 1
+    for image_id in range(1, images + 1):
+        image = _image(rng, image_id)
+        image_data.append(image)
+        w, h = image['width'], image['height']
+
+        image_regions = []
+        for _ in range(_around(rng, regions)):
+            x, y, bw, bh = _box(rng, w, h)
+            image_regions.append({
+                'region_id': region_id, 'image_id': image_id,
+                'phrase': '%s %s %s' % (rng.choice(ATTRIBUTES),
+                                        rng.choice(OBJECT_NAMES),
+                                        rng.choice(PREDICATES)),
+                'x': x, 'y': y, 'width': bw, 'height': bh})
+            region_id += 1
+        region_data.append({'id': image_id, 'regions': image_regions})
+
+        image_qas = []
+        for _ in range(_around(rng, qas)):
+            name = rng.choice(OBJECT_NAMES)
+            image_qas.append({
+                'qa_id': qa_id, 'image_id': image_id,
+                'question': '%s is the %s doing?' % (
+                    rng.choice(QUESTION_WORDS), name),
+                'answer': 'The %s is %s.' % (name, rng.choice(PREDICATES)),
+                'question_objects': [], 'answer_objects': []})
+            qa_id += 1
+        qa_data.append({'id': image_id, 'qas': image_qas})
+
+        image_objects = []
+        for _ in range(max(_around(rng, objects), 1)):
+            x, y, bw, bh = _box(rng, w, h)
+            name = rng.choice(OBJECT_NAMES)
+            image_objects.append({
+                'object_id': object_id, 'x': x, 'y': y, 'w': bw, 'h': bh,
+                'names': [name], 'synsets': [_synset(name)]})
+            object_id += 1
+        image_relationships = []
+        for _ in range(_around(rng, relationships)):
+            subject = rng.choice(image_objects)
+            object_ = rng.choice(image_objects)
+            predicate = rng.choice(PREDICATES)
+            image_relationships.append({
+                'relationship_id': relationship_id,
+                'subject_id': subject['object_id'],
+                'object_id': object_['object_id'],
+                'predicate': predicate,
+                'synsets': [_synset(predicate, 'v')]})
+            relationship_id += 1
+        scene_graph = {'image_id': image_id, 'objects': image_objects,
+                       'relationships': image_relationships}
+        scene_graphs.append(scene_graph)
+
+        image_attributes = []
+        merged = []
+        for obj in image_objects:
+            if rng.random() < 0.5:
+                continue
+            values = rng.sample(ATTRIBUTES, rng.randint(1, 2))
+            image_attributes.append(dict(obj, attributes=values))
+            merged.append({'attribute_id': attribute_id,
+                           'attribute': dict(
+                               obj, attributes=values,
+                               synsets=[_synset(v, 's') for v in values])})
+            attribute_id += 1
+        attribute_data.append({'image_id': image_id,
+                               'attributes': image_attributes})
+        _dump(os.path.join(by_id_dir, '%d.json' % image_id),
+              dict(scene_graph, attributes=merged))
+
+    _dump(os.path.join(out_dir, 'image_data.json'), image_data)
+    _dump(os.path.join(out_dir, 'region_descriptions.json'), region_data)
+    _dump(os.path.join(out_dir, 'question_answers.json'), qa_data)
+    _dump(os.path.join(out_dir, 'scene_graphs.json'), scene_graphs)
+    _dump(os.path.join(out_dir, 'attributes.json'), attribute_data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--out-dir', default='bench-data/')
+    parser.add_argument('--images', type=int, default=1000)
+    parser.add_argument('--regions', type=int, default=50,
+                        help='average regions per image')
+    parser.add_argument('--objects', type=int, default=35,
+                        help='average objects per image')
+    parser.add_argument('--relationships', type=int, default=21,
+                        help='average relationships per image')
+    parser.add_argument('--qas', type=int, default=17,
+                        help='average QAs per image')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    generate(args.out_dir, args.images, args.regions, args.objects,
+             args.relationships, args.qas, args.seed)
+
+
+if __name__ == '__main__':
+    main()
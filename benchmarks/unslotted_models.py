@@ -0,0 +1,65 @@
+"""
+`Image` and `Region` as they were before the models declared `__slots__`,
+used by `models_memory` as the baseline. Kept verbatim; do not update them
+along with `visual_genome.models`.
+"""
+
+
+class Image:
+    """
+    Image.
+      ID         int
+      url        hyperlink string
+      width      int
+      height     int
+    """
+
+    def __init__(self, id, url, width, height, coco_id, flickr_id):
+        self.id = id
+        self.url = url
+        self.width = width
+        self.height = height
+        self.coco_id = coco_id
+        self.flickr_id = flickr_id
+
+    def __str__(self):
+        return 'id: %d, coco_id: %d, flickr_id: %d, width: %d, url: %s' \
+            % (self.id, -1
+                if self.coco_id is None
+                else self.coco_id, -1
+                if self.flickr_id is None
+                else self.flickr_id, self.width, self.url)
+
+    def __repr__(self):
+        return str(self)
+
+
+class Region:
+    """
+    Region.
+      image 		   int
+      phrase           string
+      x                int
+      y                int
+      width            int
+      height           int
+    """
+
+    def __init__(self, id, image, phrase, x, y, width, height):
+        self.id = id
+        self.image = image
+        self.phrase = phrase
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def __str__(self):
+        stat_str = 'id: {0}, x: {1}, y: {2}, width: {3},' \
+                   'height: {4}, phrase: {5}, image: {6}'
+        return stat_str.format(self.id, self.x, self.y,
+                               self.width, self.height, self.phrase,
+                               self.image.id)
+
+    def __repr__(self):
+        return str(self)
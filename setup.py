@@ -23,6 +23,7 @@ def get_description():
 
 
 REQUIREMENTS = ['requests']
+EXTRAS_REQUIRE = {'numpy': ['numpy']}
 
 setup(
     name='visual_genome',
@@ -34,8 +35,11 @@ setup(
     author_email='anjaykrishna@gmail.com',
     description='A pure python wrapper for the Visual Genome API',
     # long_description=get_description(),
-    packages=find_packages(exclude=['contrib', 'docs', 'tests*']),
+    packages=find_packages(exclude=['contrib', 'docs', 'tests*',
+                                    'benchmarks*']),
+    python_requires='>=3.7',
     install_requires=REQUIREMENTS,
+    extras_require=EXTRAS_REQUIRE,
     include_package_data=True,
     classifiers=[
         'Development Status :: 4 - Beta',
@@ -45,7 +49,11 @@ setup(
         'Operating System :: MacOS',
         'Operating System :: Microsoft :: Windows',
         'Operating System :: POSIX :: Linux',
-        'Programming Language :: Python :: 2.7',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6'
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11'
     ])
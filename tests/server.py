@@ -0,0 +1,96 @@
+"""
+Local HTTP stand-in for the Visual Genome API and dataset servers.
+"""
+import hashlib
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInServer:
+    """
+    Serve `files`, a dict of path -> bytes, on a free local port.
+      ranges     answer `Range` requests with 206 partial content
+      failures   dict of path -> number of 503s to answer before the file
+    Every request is recorded in `requests` as (path, Range header), and
+    the address of every connection in `connections`.
+    """
+
+    def __init__(self, files, ranges=True, failures=None):
+        self.files = files
+        self.ranges = ranges
+        self.failures = dict(failures or {})
+        self.requests = []
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.httpd = _HTTPServer(('127.0.0.1', 0), _handler(self))
+        self.url = 'http://127.0.0.1:%d' % self.httpd.server_address[1]
+
+    def etag(self, path):
+        return '"%s"' % hashlib.md5(self.files[path]).hexdigest()
+
+    def __enter__(self):
+        thread = threading.Thread(target=self.httpd.serve_forever,
+                                  kwargs={'poll_interval': 0.05})
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients close the connection early on purpose, e.g. after reading
+        # the first byte of a probe.
+        pass
+
+
+def _handler(server):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path
+            with server.lock:
+                server.requests.append((path, self.headers.get('Range')))
+                server.connections.add(self.client_address)
+                failing = server.failures.get(path, 0)
+                if failing:
+                    server.failures[path] = failing - 1
+            if failing:
+                return self._send(503, b'')
+            if path not in server.files:
+                return self._send(404, b'{"detail": "Not found."}')
+            data = server.files[path]
+            headers = {'ETag': server.etag(path)}
+            match = re.match(r'bytes=(\d+)-(\d*)$',
+                             self.headers.get('Range', ''))
+            if_range = self.headers.get('If-Range')
+            if not server.ranges or match is None or \
+                    (if_range is not None and if_range != headers['ETag']):
+                return self._send(200, data, headers)
+            start = int(match.group(1))
+            end = int(match.group(2) or len(data) - 1)
+            end = min(end, len(data) - 1)
+            headers['Content-Range'] = 'bytes %d-%d/%d' % (start, end,
+                                                           len(data))
+            return self._send(206, data[start:end + 1], headers)
+
+        def _send(self, status, body, headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
@@ -0,0 +1,60 @@
+import json
+import unittest
+
+import visual_genome.utils as utils
+from visual_genome import api, cache, client
+from tests.server import StandInServer
+
+IMAGE = {'id': 1, 'url': 'https://example.com/1.jpg', 'width': 800,
+         'height': 600, 'coco_id': None, 'flickr_id': 5}
+FILES = {'/api/v0/images/1': json.dumps(IMAGE).encode('utf-8')}
+
+
+class ClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = client.set_client(None)
+        self.previous_image_cache = cache.set_image_cache(cache.ImageCache())
+
+    def tearDown(self):
+        client.set_client(self.previous).close()
+        cache.set_image_cache(self.previous_image_cache)
+
+    def test_configure_base_url(self):
+        with StandInServer(FILES) as server:
+            http = client.configure(base_url=server.url)
+            self.assertIs(client.get_client(), http)
+            self.assertEqual(utils.retrieve_data('/api/v0/images/1'), IMAGE)
+            self.assertTrue(utils.is_not_found(
+                utils.retrieve_data('/api/v0/images/2')))
+        self.assertEqual([path for path, _ in server.requests],
+                         ['/api/v0/images/1', '/api/v0/images/2'])
+
+    def test_set_client(self):
+        with StandInServer(FILES) as server:
+            http = client.Client(base_url=server.url)
+            client.set_client(http)
+            image = api.get_image_data(id=1)
+            self.assertIs(client.set_client(http), http)
+        self.assertEqual((image.id, image.width, image.flickr_id), (1, 800, 5))
+        self.assertEqual(len(server.requests), 1)
+
+    def test_retries(self):
+        with StandInServer(FILES,
+                           failures={'/api/v0/images/1': 2}) as server:
+            client.configure(base_url=server.url, retries=2,
+                             backoff_factor=0)
+            self.assertEqual(utils.retrieve_data('/api/v0/images/1'), IMAGE)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_keep_alive(self):
+        with StandInServer(FILES) as server:
+            client.configure(base_url=server.url)
+            for _ in range(3):
+                utils.retrieve_data('/api/v0/images/1')
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(len(server.connections), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from visual_genome import download
+from tests.server import StandInServer
+
+CHUNK_SIZE = 1000
+DATA = bytes(bytearray(i * 7 % 256 for i in range(10 * CHUNK_SIZE + 123)))
+
+
+def _zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+class DownloadFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.dest = os.path.join(self.dir, 'file.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def ranges(self, server):
+        return [r for _, r in server.requests if r != 'bytes=0-0']
+
+    def test_ranged_download(self):
+        with StandInServer({'/file.bin': DATA}) as server:
+            download.download_file(server.url + '/file.bin', self.dest,
+                                   workers=4, chunk_size=CHUNK_SIZE)
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), DATA)
+        self.assertEqual(len(self.ranges(server)), 11)
+        self.assertFalse(os.path.exists(self.dest + download.PART_SUFFIX))
+        self.assertFalse(os.path.exists(self.dest + download.STATE_SUFFIX))
+
+    def test_resume(self):
+        with StandInServer({'/file.bin': DATA}) as server:
+            # An interrupted run that got the first three chunks.
+            with open(self.dest + download.PART_SUFFIX, 'wb') as f:
+                f.write(DATA[:3 * CHUNK_SIZE])
+                f.truncate(len(DATA))
+            with open(self.dest + download.STATE_SUFFIX, 'w') as f:
+                json.dump({'size': len(DATA), 'chunk_size': CHUNK_SIZE,
+                           'validators': {'etag': server.etag('/file.bin'),
+                                          'last_modified': None},
+                           'done': [0, 1, 2]}, f)
+            download.download_file(server.url + '/file.bin', self.dest,
+                                   workers=4, chunk_size=CHUNK_SIZE)
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), DATA)
+        starts = sorted(int(r[6:].split('-')[0]) for r in self.ranges(server))
+        self.assertEqual(starts, [i * CHUNK_SIZE for i in range(3, 11)])
+
+    def test_resume_after_server_copy_changed(self):
+        with StandInServer({'/file.bin': DATA}) as server:
+            with open(self.dest + download.PART_SUFFIX, 'wb') as f:
+                f.write(b'x' * len(DATA))
+            with open(self.dest + download.STATE_SUFFIX, 'w') as f:
+                json.dump({'size': len(DATA), 'chunk_size': CHUNK_SIZE,
+                           'validators': {'etag': '"old"',
+                                          'last_modified': None},
+                           'done': [0, 1, 2]}, f)
+            download.download_file(server.url + '/file.bin', self.dest,
+                                   chunk_size=CHUNK_SIZE)
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), DATA)
+        self.assertEqual(len(self.ranges(server)), 11)
+
+    def test_server_without_ranges(self):
+        with StandInServer({'/file.bin': DATA}, ranges=False) as server:
+            download.download_file(server.url + '/file.bin', self.dest,
+                                   chunk_size=CHUNK_SIZE)
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), DATA)
+        # The probe, then the whole file in one request.
+        self.assertEqual([r for _, r in server.requests], ['bytes=0-0', None])
+
+    def test_checksum(self):
+        digest = hashlib.sha256(DATA).hexdigest()
+        with StandInServer({'/file.bin': DATA}) as server:
+            download.download_file(server.url + '/file.bin', self.dest,
+                                   chunk_size=CHUNK_SIZE,
+                                   checksum='sha256:' + digest)
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), DATA)
+
+    def test_checksum_mismatch(self):
+        with StandInServer({'/file.bin': DATA}) as server:
+            with self.assertRaises(download.DownloadError):
+                download.download_file(server.url + '/file.bin', self.dest,
+                                       chunk_size=CHUNK_SIZE,
+                                       checksum='sha256:' + '0' * 64)
+        self.assertEqual(os.listdir(self.dir), [])
+
+
+class ExtractTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.out_dir = os.path.join(self.dir, 'data')
+        os.mkdir(self.out_dir)
+        self.archive = os.path.join(self.dir, 'archive.zip')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_extract(self):
+        with open(self.archive, 'wb') as f:
+            f.write(_zip({'a.json': b'[1]', 'sub/b.json': b'[2]'}))
+        paths = download.extract(self.archive, self.out_dir)
+        self.assertEqual(sorted(os.path.relpath(p, self.out_dir)
+                                for p in paths),
+                         ['a.json', os.path.join('sub', 'b.json')])
+        self.assertFalse(os.path.exists(self.archive))
+
+    def test_rejects_entries_outside_data_dir(self):
+        with open(self.archive, 'wb') as f:
+            f.write(_zip({'../evil.json': b'[]'}))
+        with self.assertRaises(download.DownloadError):
+            download.extract(self.archive, self.out_dir)
+        self.assertFalse(os.path.exists(os.path.join(self.dir, 'evil.json')))
+        self.assertTrue(os.path.exists(self.archive))
+
+
+class DownloadDatasetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_download_dataset(self):
+        files = {'/image_data.json.zip': _zip({'image_data.json': b'[]'}),
+                 '/synsets.json': b'[]'}
+        with StandInServer(files) as server:
+            paths = download.download_dataset(
+                self.dir, ['image_data.json.zip', 'synsets.json'],
+                base_url=server.url, chunk_size=CHUNK_SIZE)
+        self.assertEqual(paths, {
+            'image_data.json.zip': [os.path.join(os.path.realpath(self.dir),
+                                                 'image_data.json')],
+            'synsets.json': [os.path.join(self.dir, 'synsets.json')]})
+        self.assertEqual(sorted(os.listdir(self.dir)),
+                         ['image_data.json', 'synsets.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+"""
+Visual Genome Python API wrapper, asyncio functions
+
+Coroutine versions of the functions in `visual_genome.api`. Pages and the
+image lookups of each page are requested concurrently, through the pooled
+client of `visual_genome.client`, by a shared pool of at most
+`concurrency` threads (see `set_concurrency`).
+"""
+import asyncio
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import visual_genome.utils as utils
+from visual_genome import cache
+
+DEFAULT_CONCURRENCY = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+_concurrency = DEFAULT_CONCURRENCY
+
+
+def set_concurrency(concurrency):
+    """
+    Set how many requests may be in flight at once. Keep it at most the
+    `pool_maxsize` of the client so that every connection is reused.
+    """
+    global _executor, _concurrency
+    with _executor_lock:
+        previous, _executor = _executor, None
+        _concurrency = concurrency
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(_concurrency)
+        return _executor
+
+
+async def retrieve_data(request):
+    """
+    Coroutine version of `utils.retrieve_data`.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), utils.retrieve_data,
+                                      request)
+
+
+async def _retrieve_pages(path, max_items=None):
+    """
+    Get the `results` of every page of a paginated request, in order.
+
+    The number of pages is worked out from the `count` of the first page and
+    the remaining ones are fetched concurrently; if the count is missing the
+    pages are followed one at a time through `next`. With `max_items` only
+    the pages needed for that many results are fetched.
+    """
+    first = await retrieve_data(path + '1')
+    pages = [first['results']]
+    page_size = len(first['results'])
+    if first['next'] is None or page_size == 0:
+        return pages
+    if 'count' in first:
+        count = first['count']
+        if max_items is not None:
+            count = min(count, max_items)
+        n_pages = int(math.ceil(float(count) / page_size))
+        rest = await asyncio.gather(*[retrieve_data(path + str(page))
+                                      for page in range(2, n_pages + 1)])
+        pages.extend(data['results'] for data in rest)
+        return pages
+    page = 1
+    data = first
+    while data['next'] is not None:
+        if max_items is not None and page * page_size >= max_items:
+            break
+        page += 1
+        data = await retrieve_data(path + str(page))
+        pages.append(data['results'])
+    return pages
+
+
+async def _get_image_map(image_ids):
+    """
+    Get a dict of image id -> `Image`, fetching every image concurrently.
+    """
+    image_ids = list(set(image_ids))
+    images = await asyncio.gather(*[get_image_data(id=image_id)
+                                    for image_id in image_ids])
+    return dict(zip(image_ids, images))
+
+
+async def get_all_image_ids():
+    """
+    Get all Image ids.
+    """
+    pages = await _retrieve_pages('/api/v0/images/all?page=')
+    return [image_id for page in pages for image_id in page]
+
+
+async def get_image_ids_in_range(start_index=0, end_index=99):
+    """
+    Get Image ids from start_index to end_index.
+    """
+    ids_per_page = 1000
+    start_page = start_index // ids_per_page + 1
+    end_page = end_index // ids_per_page + 1
+    pages = await asyncio.gather(
+        *[retrieve_data('/api/v0/images/all?page=' + str(page))
+          for page in range(start_page, end_page + 1)])
+    ids = [image_id for data in pages for image_id in data['results']]
+    ids = ids[start_index % ids_per_page:]
+    ids = ids[:end_index - start_index + 1]
+    return ids
+
+
+async def get_image_data(id=61512):
+    """
+    Get data about an image.
+    Images are kept in the shared cache of `visual_genome.cache`.
+    """
+    image_cache = cache.get_image_cache()
+    image = image_cache.get(id)
+    if image is not None:
+        return image
+    data = await retrieve_data('/api/v0/images/' + str(id))
+    if utils.is_not_found(data):
+        return None
+    image = utils.parse_image_data(data)
+    image_cache.put(image)
+    return image
+
+
+async def get_region_descriptions_of_image(id=61512):
+    """
+    Get the region descriptions of an image.
+    """
+    image, data = await asyncio.gather(
+        get_image_data(id=id),
+        retrieve_data('/api/v0/images/' + str(id) + '/regions'))
+    if utils.is_not_found(data):
+        return None
+    return utils.parse_region_descriptions(data, image)
+
+
+async def get_region_graph_of_region(image_id=61512, region_id=1):
+    """
+    Get Region Graph of a particular Region in an image.
+    """
+    image, data = await asyncio.gather(
+        get_image_data(id=image_id),
+        retrieve_data('/api/v0/images/' + str(image_id) + '/regions/' +
+                      str(region_id)))
+    if utils.is_not_found(data):
+        return None
+    return utils.parse_graph(data[0], image)
+
+
+async def get_scene_graph_of_image(id=61512):
+    """
+    Get Scene Graph of an image.
+    """
+    image, data = await asyncio.gather(
+        get_image_data(id=id),
+        retrieve_data('/api/v0/images/' + str(id) + '/graph'))
+    if utils.is_not_found(data):
+        return None
+    return utils.parse_graph(data, image)
+
+
+async def _get_QAs(path, qtotal=None):
+    """
+    Get the QAs of a paginated QA request, with their images.
+    """
+    pages = await _retrieve_pages(path, max_items=qtotal)
+    results = [d for page in pages for d in page]
+    if qtotal is not None:
+        results = results[:qtotal]
+    image_map = await _get_image_map(d['image'] for d in results)
+    return utils.parse_QA(results, image_map)
+
+
+async def get_all_QAs(qtotal=100):
+    """
+    Gets all the QA from the dataset.
+    qtotal: int       total number of QAs to return.
+                      Set to None if all QAs should be returned
+    """
+    return await _get_QAs('/api/v0/qa/all?page=', qtotal)
+
+
+async def get_QA_of_type(qtype='why', qtotal=100):
+    """
+    Get all QA's of a particular type - example, 'why'
+    qtype: string    possible values: what, where, when, why, who, how.
+    qtotal: int      total number of QAs to return.
+                     Set to None if all QAs should be returned
+    """
+    return await _get_QAs('/api/v0/qa/' + qtype + '?page=', qtotal)
+
+
+async def get_QA_of_image(id=61512):
+    """
+    Get all QAs for a particular image.
+    """
+    return await _get_QAs('/api/v0/image/' + str(id) + '/qa?page=')
@@ -1,48 +1,106 @@
 
+import collections
+import concurrent.futures
+import itertools
 import visual_genome.utils as utils
+from visual_genome import cache
+
+
+IDS_PER_PAGE = 1000
+
+
+def iter_image_ids(start_index=0, end_index=None, window=4):
+    """
+    Iterate over Image ids from start_index through end_index (None for
+    all of them), in order.
+    window: int      number of pages fetched concurrently ahead of the
+                     one being consumed
+
+    Only the pages holding the requested range are fetched; the page count
+    is worked out from the first of them.
+    """
+    if window < 1:
+        raise ValueError('window must be at least 1, got %r' % (window,))
+    return _iter_image_ids(start_index, end_index, window)
+
+
+def _iter_image_ids(start_index, end_index, window):
+    page = start_index // IDS_PER_PAGE + 1
+    first = utils.retrieve_data('/api/v0/images/all?page=' + str(page))
+    if end_index is None and 'count' not in first:
+        # Without a count, pages can only be followed one after another.
+        data = first
+        skip = start_index % IDS_PER_PAGE
+        while True:
+            for image_id in data['results'][skip:]:
+                yield image_id
+            skip = 0
+            if data['next'] is None:
+                return
+            page += 1
+            data = utils.retrieve_data('/api/v0/images/all?page=' + str(page))
+
+    if end_index is None:
+        end_index = first['count'] - 1
+    elif 'count' in first:
+        end_index = min(end_index, first['count'] - 1)
+    last_page = end_index // IDS_PER_PAGE + 1
+
+    executor = concurrent.futures.ThreadPoolExecutor(window)
+    pending = collections.deque()
+    try:
+        next_page = page + 1
+        data = first
+        index = (page - 1) * IDS_PER_PAGE
+        while True:
+            while next_page <= last_page and len(pending) < window:
+                pending.append(executor.submit(
+                    utils.retrieve_data,
+                    '/api/v0/images/all?page=' + str(next_page)))
+                next_page += 1
+            for image_id in data['results']:
+                if index > end_index:
+                    return
+                if index >= start_index:
+                    yield image_id
+                index += 1
+            if not pending or data['next'] is None:
+                return
+            data = pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
 
 
 def get_all_image_ids():
     """
     Get all Image ids.
     """
-    page = 1
-    next = '/api/v0/images/all?page=' + str(page)
-    ids = []
-    while True:
-        data = utils.retrieve_data(next)
-        ids.extend(data['results'])
-        if data['next'] is None:
-            break
-        page += 1
-        next = '/api/v0/images/all?page=' + str(page)
-    return ids
+    return list(iter_image_ids())
 
 
 def get_image_ids_in_range(start_index=0, end_index=99):
     """
     Get Image ids from start_index to end_index.
     """
-    ids_per_page = 1000
-    start_page = start_index // ids_per_page + 1
-    end_page = end_index // ids_per_page + 1
-    ids = []
-    for page in range(start_page, end_page + 1):
-        data = utils.retrieve_data('/api/v0/images/all?page=' + str(page))
-        ids.extend(data['results'])
-    ids = ids[start_index % 100:]
-    ids = ids[:end_index - start_index + 1]
-    return ids
+    return list(iter_image_ids(start_index, end_index))
 
 
 def get_image_data(id=61512):
     """
     Get data about an image.
+    Images are kept in the shared cache of `visual_genome.cache`.
     """
+    image_cache = cache.get_image_cache()
+    image = image_cache.get(id)
+    if image is not None:
+        return image
     data = utils.retrieve_data('/api/v0/images/' + str(id))
-    if 'detail' in data and data['detail'] == 'Not found.':
+    if utils.is_not_found(data):
         return None
     image = utils.parse_image_data(data)
+    image_cache.put(image)
     return image
 
 
@@ -52,7 +110,7 @@ def get_region_descriptions_of_image(id=61512):
     """
     image = get_image_data(id=id)
     data = utils.retrieve_data('/api/v0/images/' + str(id) + '/regions')
-    if 'detail' in data and data['detail'] == 'Not found.':
+    if utils.is_not_found(data):
         return None
     return utils.parse_region_descriptions(data, image)
 
@@ -64,7 +122,7 @@ def get_region_graph_of_region(image_id=61512, region_id=1):
     image = get_image_data(id=image_id)
     data = utils.retrieve_data(
         '/api/v0/images/' + str(image_id) + '/regions/' + str(region_id))
-    if 'detail' in data and data['detail'] == 'Not found.':
+    if utils.is_not_found(data):
         return None
     return utils.parse_graph(data[0], image)
 
@@ -75,78 +133,151 @@ def get_scene_graph_of_image(id=61512):
     """
     image = get_image_data(id=id)
     data = utils.retrieve_data('/api/v0/images/' + str(id) + '/graph')
-    if 'detail' in data and data['detail'] == 'Not found.':
+    if utils.is_not_found(data):
         return None
     return utils.parse_graph(data, image)
 
 
-def get_all_QAs(qtotal=100):
+def fetch_each(function, ids, workers=8):
+    """
+    Call `function(id=...)` for each distinct id on a pool of `workers`
+    threads, yielding (id, result, error) as calls complete. A failed call
+    yields (id, None, exception) and does not stop the others.
+    """
+    def call(image_id):
+        try:
+            return image_id, function(id=image_id), None
+        except Exception as e:
+            return image_id, None, e
+
+    seen = set()
+    unique_ids = (i for i in ids if not (i in seen or seen.add(i)))
+    executor = concurrent.futures.ThreadPoolExecutor(workers)
+    try:
+        # Keep a bounded number of calls in flight, so that a consumer that
+        # stops early does not leave the whole batch running.
+        pending = set(executor.submit(call, image_id) for image_id
+                      in itertools.islice(unique_ids, 2 * workers))
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                for image_id in itertools.islice(unique_ids, 1):
+                    pending.add(executor.submit(call, image_id))
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def get_scene_graphs_of_images(ids, workers=8):
+    """
+    Get the Scene Graphs of many images, fetched by `workers` threads.
+    Yields (id, graph, error) in completion order; graph is None if the
+    image is not found or the fetch failed, and error is the exception of
+    a failed fetch.
+    """
+    return fetch_each(get_scene_graph_of_image, ids, workers)
+
+
+def get_region_descriptions_of_images(ids, workers=8):
+    """
+    Get the region descriptions of many images, fetched by `workers`
+    threads. Yields (id, regions, error) in completion order; regions is
+    None if the image is not found or the fetch failed, and error is the
+    exception of a failed fetch.
+    """
+    return fetch_each(get_region_descriptions_of_image, ids, workers)
+
+
+def _iter_QAs(path, qtotal=None, workers=4):
+    """
+    Yield the QAs of a paginated QA request as soon as their page is parsed.
+    While a page is being consumed, the next one and the images of its QAs
+    (fetched by `workers` threads) are retrieved in the background. Nothing
+    more is fetched once `qtotal` QAs have been yielded or the consumer
+    stops.
+    """
+    image_executor = concurrent.futures.ThreadPoolExecutor(workers)
+
+    def fetch(page):
+        data = utils.retrieve_data(path + str(page))
+        image_ids = set(d['image'] for d in data['results'])
+        images = image_executor.map(lambda i: get_image_data(id=i), image_ids)
+        return data, dict(zip(image_ids, images))
+
+    page_executor = concurrent.futures.ThreadPoolExecutor(1)
+    page = 1
+    future = page_executor.submit(fetch, page)
+    count = 0
+    try:
+        while future is not None:
+            data, image_map = future.result()
+            future = None
+            if data['next'] is not None and (
+                    qtotal is None or count + len(data['results']) < qtotal):
+                page += 1
+                future = page_executor.submit(fetch, page)
+            for qa in utils.parse_QA(data['results'], image_map):
+                if qtotal is not None and count >= qtotal:
+                    return
+                yield qa
+                count += 1
+    finally:
+        if future is not None:
+            future.cancel()
+        page_executor.shutdown(wait=False)
+        image_executor.shutdown(wait=False)
+
+
+def iter_all_QAs(qtotal=None, workers=4):
+    """
+    Iterate over all the QA from the dataset, page by page.
+    qtotal: int       total number of QAs to yield.
+                      Set to None if all QAs should be yielded
+    """
+    return _iter_QAs('/api/v0/qa/all?page=', qtotal, workers)
+
+
+def iter_QA_of_type(qtype='why', qtotal=None, workers=4):
+    """
+    Iterate over the QA's of a particular type - example, 'why'
+    qtype: string    possible values: what, where, when, why, who, how.
+    qtotal: int      total number of QAs to yield.
+                     Set to None if all QAs should be yielded
+    """
+    return _iter_QAs('/api/v0/qa/' + qtype + '?page=', qtotal, workers)
+
+
+def iter_QA_of_image(id=61512, workers=4):
+    """
+    Iterate over all QAs for a particular image.
+    """
+    return _iter_QAs('/api/v0/image/' + str(id) + '/qa?page=', None, workers)
+
+
+def get_all_QAs(qtotal=100, workers=4):
     """
     Gets all the QA from the dataset.
     qtotal: int       total number of QAs to return.
                       Set to None if all QAs should be returned
     """
-    page = 1
-    next = '/api/v0/qa/all?page=' + str(page)
-    qas = []
-    image_map = {}
-    while True:
-        data = utils.retrieve_data(next)
-        for d in data['results']:
-            if d['image'] not in image_map:
-                image_map[d['image']] = get_image_data(id=d['image'])
-        qas.extend(utils.parse_QA(data['results'], image_map))
-        if qtotal is not None and len(qas) > qtotal:
-            return qas
-        if data['next'] is None:
-            break
-        page += 1
-        next = '/api/v0/qa/all?page=' + str(page)
-    return qas
-
-
-def get_QA_of_type(qtype='why', qtotal=100):
+    return list(iter_all_QAs(qtotal, workers))
+
+
+def get_QA_of_type(qtype='why', qtotal=100, workers=4):
     """
     Get all QA's of a particular type - example, 'why'
     qtype: string    possible values: what, where, when, why, who, how.
     qtotal: int      total number of QAs to return.
                      Set to None if all QAs should be returned
     """
-    page = 1
-    next = '/api/v0/qa/' + qtype + '?page=' + str(page)
-    qas = []
-    image_map = {}
-    while True:
-        data = utils.retrieve_data(next)
-        for d in data['results']:
-            if d['image'] not in image_map:
-                image_map[d['image']] = get_image_data(id=d['image'])
-        qas.extend(utils.parse_QA(data['results'], image_map))
-        if qtotal is not None and len(qas) > qtotal:
-            return qas
-        if data['next'] is None:
-            break
-        page += 1
-        next = '/api/v0/qa/' + qtype + '?page=' + str(page)
-    return qas
-
-
-def get_QA_of_image(id=61512):
+    return list(iter_QA_of_type(qtype, qtotal, workers))
+
+
+def get_QA_of_image(id=61512, workers=4):
     """
     Get all QAs for a particular image.
     """
-    page = 1
-    next = '/api/v0/image/' + str(id) + '/qa?page=' + str(page)
-    qas = []
-    image_map = {}
-    while True:
-        data = utils.retrieve_data(next)
-        for d in data['results']:
-            if d['image'] not in image_map:
-                image_map[d['image']] = get_image_data(id=d['image'])
-        qas.extend(utils.parse_QA(data['results'], image_map))
-        if data['next'] is None:
-            break
-        page += 1
-        next = '/api/v0/image/' + str(id) + '/qa?page=' + str(page)
-    return qas
+    return list(iter_QA_of_image(id, workers))
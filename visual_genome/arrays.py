@@ -0,0 +1,193 @@
+"""
+Visual Genome Python API wrapper, NumPy exports
+
+Builds structured NumPy arrays of region and object boxes straight from the
+JSON records, without creating `Region` or `Object` models, and vectorized
+box geometry on top of them. Requires numpy
+(`pip install visual_genome[numpy]`).
+
+Phrases and object names are stored as indices into a separate list of
+unique strings; objects keep their first name, or -1 if they have none.
+"""
+import io
+import os
+from array import array
+import visual_genome.utils as utils
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    REGION_DTYPE = np.dtype([('image_id', np.int64), ('id', np.int64),
+                             ('x', np.int32), ('y', np.int32),
+                             ('width', np.int32), ('height', np.int32),
+                             ('phrase', np.int32)])
+    OBJECT_DTYPE = np.dtype([('image_id', np.int64), ('id', np.int64),
+                             ('x', np.int32), ('y', np.int32),
+                             ('width', np.int32), ('height', np.int32),
+                             ('name', np.int32)])
+
+
+def require_numpy(module='visual_genome.arrays'):
+    """
+    Raise an ImportError naming `module` if numpy is not installed.
+    """
+    if np is None:
+        raise ImportError('%s requires numpy, install it with '
+                          '`pip install visual_genome[numpy]`' % module)
+
+
+def _intern(strings, index, item):
+    sid = index.get(item)
+    if sid is None:
+        sid = index[item] = len(strings)
+        strings.append(item)
+    return sid
+
+
+def _to_structured(columns, dtype):
+    out = np.empty(len(columns['id']), dtype=dtype)
+    for name in dtype.names:
+        out[name] = np.asarray(columns[name], dtype=dtype[name])
+    return out
+
+
+def regions_to_arrays(records, strings=None):
+    """
+    Convert `region_descriptions.json` records into a REGION_DTYPE array.
+    Returns (regions, strings) where `regions['phrase']` indexes `strings`;
+    pass `strings` to keep extending an existing table.
+    """
+    require_numpy()
+    strings = [] if strings is None else strings
+    index = {s: i for i, s in enumerate(strings)}
+    columns = {'image_id': array('q'), 'id': array('q'), 'x': array('i'),
+               'y': array('i'), 'width': array('i'), 'height': array('i'),
+               'phrase': array('i')}
+    for record in records:
+        image_id = record['id']
+        for info in record['regions']:
+            columns['image_id'].append(image_id)
+            columns['id'].append(info['region_id'] if 'region_id' in info
+                                 else info['id'])
+            columns['x'].append(info['x'])
+            columns['y'].append(info['y'])
+            columns['width'].append(info['width'])
+            columns['height'].append(info['height'])
+            columns['phrase'].append(_intern(strings, index, info['phrase']))
+    return _to_structured(columns, REGION_DTYPE), strings
+
+
+def objects_to_arrays(records, strings=None):
+    """
+    Convert scene graph records, as in `scene_graphs.json` or the `by-id/`
+    files, into an OBJECT_DTYPE array. Returns (objects, strings) where
+    `objects['name']` indexes `strings`.
+    """
+    require_numpy()
+    strings = [] if strings is None else strings
+    index = {s: i for i, s in enumerate(strings)}
+    columns = {'image_id': array('q'), 'id': array('q'), 'x': array('i'),
+               'y': array('i'), 'width': array('i'), 'height': array('i'),
+               'name': array('i')}
+    for record in records:
+        image_id = record['image_id']
+        for obj in record['objects']:
+            columns['image_id'].append(image_id)
+            columns['id'].append(obj['object_id'])
+            columns['x'].append(obj['x'])
+            columns['y'].append(obj['y'])
+            columns['width'].append(obj['w'] if 'w' in obj else obj['width'])
+            columns['height'].append(obj['h'] if 'h' in obj
+                                     else obj['height'])
+            names = obj['names']
+            columns['name'].append(
+                _intern(strings, index, names[0]) if names else -1)
+    return _to_structured(columns, OBJECT_DTYPE), strings
+
+
+def load_region_arrays(data_dir=None):
+    """
+    Stream `region_descriptions.json` into a REGION_DTYPE array.
+    """
+    if data_dir is None:
+        data_dir = utils.get_data_dir()
+    data_file = os.path.join(data_dir, 'region_descriptions.json')
+    with io.open(data_file, 'r', encoding='utf-8') as f:
+        return regions_to_arrays(utils.iter_json_array(f))
+
+
+def load_object_arrays(data_dir=None):
+    """
+    Stream `scene_graphs.json` into an OBJECT_DTYPE array.
+    """
+    if data_dir is None:
+        data_dir = utils.get_data_dir()
+    data_file = os.path.join(data_dir, 'scene_graphs.json')
+    with io.open(data_file, 'r', encoding='utf-8') as f:
+        return objects_to_arrays(utils.iter_json_array(f))
+
+
+def as_xywh(boxes):
+    """
+    Get an (n, 4) float array of x, y, width, height from a REGION_DTYPE or
+    OBJECT_DTYPE array, or from anything shaped (n, 4).
+    """
+    require_numpy()
+    if getattr(boxes, 'dtype', None) is not None and boxes.dtype.names:
+        return np.stack([boxes['x'], boxes['y'], boxes['width'],
+                         boxes['height']], axis=-1).astype(np.float64)
+    return np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+
+def box_area(boxes):
+    """
+    Get the area of every box.
+    """
+    xywh = as_xywh(boxes)
+    return xywh[:, 2] * xywh[:, 3]
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Get the (len(boxes_a), len(boxes_b)) matrix of intersection over union
+    of every pair of boxes.
+    """
+    a = as_xywh(boxes_a)
+    b = as_xywh(boxes_b)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum((a[:, 0] + a[:, 2])[:, None], (b[:, 0] + b[:, 2])[None])
+    y2 = np.minimum((a[:, 1] + a[:, 3])[:, None], (b[:, 1] + b[:, 3])[None])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None] - inter
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(union > 0, inter / union, 0.0)
+
+
+def image_sizes(image_ids, images):
+    """
+    Get the widths and heights of the images `image_ids`, looked up once
+    per distinct id in `images` (a dict of image id -> `Image`).
+    """
+    require_numpy()
+    unique, inverse = np.unique(np.asarray(image_ids), return_inverse=True)
+    widths = np.array([images[int(i)].width for i in unique], np.float64)
+    heights = np.array([images[int(i)].height for i in unique], np.float64)
+    return widths[inverse], heights[inverse]
+
+
+def normalize_boxes(boxes, images):
+    """
+    Get the boxes of a REGION_DTYPE or OBJECT_DTYPE array as an (n, 4) array
+    of x, y, width, height divided by the width and height of their image.
+    """
+    xywh = as_xywh(boxes)
+    widths, heights = image_sizes(boxes['image_id'], images)
+    xywh[:, 0] /= widths
+    xywh[:, 2] /= widths
+    xywh[:, 1] /= heights
+    xywh[:, 3] /= heights
+    return xywh
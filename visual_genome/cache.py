@@ -0,0 +1,207 @@
+"""
+Visual Genome Python API wrapper, caches
+"""
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+from visual_genome import jsonlib
+from visual_genome.models import Image
+
+
+class ImageCache:
+    """
+    Size-bounded LRU cache of `Image` objects keyed by image id, optionally
+    backed by an sqlite file that keeps every image ever stored.
+      maxsize   int, number of images kept in memory
+      path      string, sqlite file of the on-disk store, or None
+      hits      int, lookups answered from memory or disk
+      misses    int, lookups that found nothing
+    """
+
+    def __init__(self, maxsize=100000, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False,
+                                       isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS images '
+                             '(id INTEGER PRIMARY KEY, data TEXT)')
+
+    def get(self, image_id):
+        """
+        Get the cached `Image` with `image_id`, or None.
+        """
+        with self._lock:
+            image = self._images.get(image_id)
+            if image is not None:
+                self._images.move_to_end(image_id)
+            elif self._db is not None:
+                row = self._db.execute('SELECT data FROM images WHERE id = ?',
+                                       (image_id,)).fetchone()
+                if row is not None:
+                    image = Image(**jsonlib.loads(row[0]))
+                    self._insert(image_id, image)
+            if image is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return image
+
+    def put(self, image):
+        """
+        Cache `image`, writing it through to the on-disk store.
+        """
+        with self._lock:
+            self._insert(image.id, image)
+            if self._db is not None:
+                data = {'id': image.id, 'url': image.url,
+                        'width': image.width, 'height': image.height,
+                        'coco_id': image.coco_id,
+                        'flickr_id': image.flickr_id}
+                self._db.execute('INSERT OR REPLACE INTO images VALUES (?, ?)',
+                                 (image.id, json.dumps(data)))
+
+    def _insert(self, image_id, image):
+        self._images[image_id] = image
+        self._images.move_to_end(image_id)
+        while len(self._images) > self.maxsize:
+            self._images.popitem(last=False)
+
+    def clear(self):
+        """
+        Empty the in-memory cache and reset the counters; the on-disk store
+        is left untouched.
+        """
+        with self._lock:
+            self._images.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Get the hit and miss counters and the number of images in memory.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._images), 'maxsize': self.maxsize}
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """
+    Get the image cache shared by the api functions, creating an in-memory
+    one on first use.
+    """
+    global _image_cache
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                _image_cache = ImageCache()
+    return _image_cache
+
+
+def set_image_cache(image_cache):
+    """
+    Make `image_cache` the one shared by the api functions and return the
+    previous one.
+    """
+    global _image_cache
+    with _image_cache_lock:
+        previous, _image_cache = _image_cache, image_cache
+    return previous
+
+
+CachedResponse = namedtuple('CachedResponse',
+                            ['body', 'etag', 'last_modified', 'stored_at'])
+
+
+class CacheMissError(LookupError):
+    """
+    Raised by an offline `ResponseCache` for a request it does not hold.
+    """
+
+
+class ResponseCache:
+    """
+    Persistent cache of API response bodies keyed by request path, stored
+    zlib-compressed in an sqlite file. Pass it to `client.Client` as `cache`.
+      path      string, sqlite file
+      ttl       seconds a response is served without asking the server,
+                None to never revalidate
+      offline   bool, only answer from the cache and raise CacheMissError
+                for anything else
+    Stale responses are revalidated with If-None-Match / If-Modified-Since.
+    """
+
+    def __init__(self, path, ttl=24 * 60 * 60, offline=False):
+        self.path = path
+        self.ttl = ttl
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS responses '
+                         '(request TEXT PRIMARY KEY, body BLOB, etag TEXT, '
+                         'last_modified TEXT, stored_at REAL)')
+
+    def get(self, request):
+        """
+        Get the `CachedResponse` of `request`, or None.
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT body, etag, last_modified, stored_at FROM responses '
+                'WHERE request = ?', (request,)).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(zlib.decompress(row[0]), row[1], row[2], row[3])
+
+    def put(self, request, body, etag=None, last_modified=None):
+        """
+        Store the response `body` (bytes) of `request` with its validators.
+        """
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                (request, zlib.compress(body), etag, last_modified,
+                 time.time()))
+
+    def touch(self, request):
+        """
+        Mark the response of `request` as fresh again, e.g. after a 304.
+        """
+        with self._lock:
+            self._db.execute('UPDATE responses SET stored_at = ? '
+                             'WHERE request = ?', (time.time(), request))
+
+    def is_fresh(self, response):
+        """
+        Whether `response` can be served without revalidation.
+        """
+        return self.ttl is None or time.time() - response.stored_at < self.ttl
+
+    def delete(self, request):
+        with self._lock:
+            self._db.execute('DELETE FROM responses WHERE request = ?',
+                             (request,))
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,165 @@
+"""
+Visual Genome Python API wrapper, HTTP client
+"""
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from visual_genome import jsonlib, metrics
+from visual_genome.cache import CacheMissError
+
+DEFAULT_BASE_URL = 'http://visualgenome.org'
+
+
+class Client:
+    """
+    Keep-alive HTTP client with a connection pool and a retry policy.
+      base_url          string, scheme and host requests are sent to
+      timeout           seconds, or a (connect, read) tuple of seconds
+      retries           int, retries after a connection error, a read
+                        error or a 429/5xx response
+      backoff_factor    float, sleep backoff_factor * 2 ** (n - 1)
+                        seconds before the n-th retry
+      pool_connections  int, number of hosts to keep a pool for
+      pool_maxsize      int, connections kept alive per host
+      cache             `cache.ResponseCache` for JSON responses, or None
+    """
+
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, timeout=(5, 60), retries=3,
+                 backoff_factor=0.5, pool_connections=4, pool_maxsize=16,
+                 cache=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cache = cache
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff_factor,
+                      status_forcelist=self.retry_statuses,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, request, headers=None):
+        """
+        Send a GET for the `request` path and return the response.
+        """
+        return self.session.get(self.base_url + request, headers=headers,
+                                timeout=self.timeout)
+
+    def get_json(self, request):
+        """
+        Send a GET for the `request` path and decode the JSON body.
+
+        With a cache, fresh responses are served from it and stale ones are
+        revalidated with the server before being served.
+        """
+        event = {'decode_seconds': 0.0, 'bytes': 0, 'retries': 0,
+                 'status': None, 'cache': None, 'error': None}
+        start = time.perf_counter()
+        try:
+            return self._get_json(request, event)
+        except Exception as e:
+            event['error'] = type(e).__name__
+            raise
+        finally:
+            if metrics.enabled():
+                event['seconds'] = time.perf_counter() - start
+                metrics.emit('request', metrics.endpoint(request), event)
+
+    def _get_json(self, request, event):
+        if self.cache is None:
+            return self._decode(self._send(request, None, event), event)
+
+        cached = self.cache.get(request)
+        if cached is not None and (self.cache.offline or
+                                   self.cache.is_fresh(cached)):
+            event['cache'] = 'hit'
+            return self._decode_cached(cached, event)
+        if self.cache.offline:
+            raise CacheMissError(request)
+
+        headers = {}
+        if cached is not None:
+            if cached.etag is not None:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified is not None:
+                headers['If-Modified-Since'] = cached.last_modified
+        response = self._send(request, headers, event)
+        if response.status_code == 304 and cached is not None:
+            event['cache'] = 'revalidated'
+            self.cache.touch(request)
+            return self._decode_cached(cached, event)
+        event['cache'] = 'miss'
+        data = self._decode(response, event)
+        if response.status_code == 200:
+            self.cache.put(request, response.content,
+                           response.headers.get('ETag'),
+                           response.headers.get('Last-Modified'))
+        return data
+
+    def _send(self, request, headers, event):
+        response = self.get(request, headers)
+        event['status'] = response.status_code
+        event['bytes'] = len(response.content)
+        retries = getattr(response.raw, 'retries', None)
+        if retries is not None:
+            event['retries'] = len(retries.history)
+        return response
+
+    def _decode(self, response, event):
+        start = time.perf_counter()
+        data = jsonlib.loads(response.content)
+        event['decode_seconds'] += time.perf_counter() - start
+        return data
+
+    def _decode_cached(self, cached, event):
+        start = time.perf_counter()
+        data = jsonlib.loads(cached.body)
+        event['decode_seconds'] += time.perf_counter() - start
+        return data
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Get the client used by `utils.retrieve_data`, creating a default one
+    on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Client()
+    return _client
+
+
+def set_client(client):
+    """
+    Make `client` the one used by `utils.retrieve_data` and return the
+    previous one, e.g. to point the api module at a local server.
+    """
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    return previous
+
+
+def configure(**kwargs):
+    """
+    Replace the client used by `utils.retrieve_data` with a new `Client`
+    built from `kwargs`, closing the previous one.
+    """
+    previous = set_client(Client(**kwargs))
+    if previous is not None:
+        previous.close()
+    return get_client()
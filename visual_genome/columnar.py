@@ -0,0 +1,282 @@
+"""
+Visual Genome Python API wrapper, columnar scene graph store
+
+Packs scene graphs into a directory of NumPy arrays that is memory-mapped
+when read, so a scene graph is a few array slices away instead of a .json
+file to open and parse. Requires numpy (`pip install visual_genome[numpy]`).
+
+Objects, relationships and attributes of all images are concatenated into
+flat columns; `<kind>_offsets[i]:<kind>_offsets[i + 1]` are the rows of the
+i-th image. String lists (names, synsets, attribute values) are stored as
+offsets into a column of ids in the interned string table `strings.json`.
+"""
+import io
+import json
+import os
+from array import array
+import visual_genome.utils as utils
+from visual_genome import jsonlib, local
+from visual_genome.arrays import require_numpy
+from visual_genome.models import Object, Relationship, Attribute, Graph
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FORMAT_VERSION = 1
+
+
+class _StringLists:
+    """
+    Column of string lists being built, as offsets into interned ids.
+    """
+
+    def __init__(self, strings):
+        self.strings = strings
+        self.offsets = array('q', [0])
+        self.values = array('i')
+
+    def append(self, items):
+        for item in items:
+            sid = self.strings.get(item)
+            if sid is None:
+                sid = self.strings[item] = len(self.strings)
+            self.values.append(sid)
+        self.offsets.append(len(self.values))
+
+
+def write_scene_graphs(scene_graphs, out_dir):
+    """
+    Pack scene graph records, as found in `scene_graphs.json` or the
+    `by-id/` files, into a columnar store in `out_dir`.
+
+    Relationships and attributes whose object is missing from the image are
+    dropped, as `local.parse_graph_local` does.
+    """
+    require_numpy(__name__)
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    strings = {}
+    cols = {name: array('q') for name in (
+        'image_ids', 'object_ids', 'relationship_ids',
+        'relationship_subjects', 'relationship_objects', 'attribute_ids',
+        'attribute_objects')}
+    cols['object_boxes'] = array('i')
+    cols['relationship_predicates'] = array('i')
+    for kind in ('object', 'relationship', 'attribute'):
+        cols[kind + '_offsets'] = array('q', [0])
+    lists = {name: _StringLists(strings) for name in (
+        'object_names', 'object_synsets', 'object_attributes',
+        'relationship_synsets', 'attribute_values', 'attribute_synsets')}
+
+    for data in scene_graphs:
+        cols['image_ids'].append(data['image_id'])
+        rows = {}
+        for obj in data['objects']:
+            oid = obj['object_id']
+            if oid in rows:
+                continue
+            rows[oid] = len(cols['object_ids'])
+            cols['object_ids'].append(oid)
+            cols['object_boxes'].extend(
+                (obj['x'], obj['y'], obj.get('w', obj.get('width')),
+                 obj.get('h', obj.get('height'))))
+            lists['object_names'].append(obj['names'])
+            lists['object_synsets'].append(obj['synsets'])
+            lists['object_attributes'].append(obj.get('attributes', []))
+        for rel in data['relationships']:
+            if rel['subject_id'] in rows and rel['object_id'] in rows:
+                cols['relationship_ids'].append(rel['relationship_id'])
+                cols['relationship_subjects'].append(rows[rel['subject_id']])
+                cols['relationship_objects'].append(rows[rel['object_id']])
+                lists['relationship_synsets'].append(rel['synsets'])
+                cols['relationship_predicates'].append(
+                    strings.setdefault(rel['predicate'], len(strings)))
+        for attr in data.get('attributes', []):
+            a = attr['attribute']
+            if a['object_id'] in rows:
+                cols['attribute_ids'].append(attr['attribute_id'])
+                cols['attribute_objects'].append(rows[a['object_id']])
+                lists['attribute_values'].append(a['attributes'])
+                lists['attribute_synsets'].append(a['synsets'])
+        cols['object_offsets'].append(len(cols['object_ids']))
+        cols['relationship_offsets'].append(len(cols['relationship_ids']))
+        cols['attribute_offsets'].append(len(cols['attribute_ids']))
+
+    arrays = {}
+    for name, col in cols.items():
+        arrays[name] = np.array(col, dtype=np.int64 if col.typecode == 'q'
+                                else np.int32)
+    arrays['object_boxes'] = arrays['object_boxes'].reshape(-1, 4)
+    for name, column in lists.items():
+        arrays[name + '_offsets'] = np.array(column.offsets, dtype=np.int64)
+        arrays[name] = np.array(column.values, dtype=np.int32)
+    # Sorted copy of the image ids used to look up the row of an image.
+    order = np.argsort(arrays['image_ids'], kind='stable')
+    arrays['image_index_ids'] = arrays['image_ids'][order]
+    arrays['image_index_rows'] = order.astype(np.int64)
+
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, name + '.npy'), arr)
+    table = sorted(strings, key=strings.get)
+    with io.open(os.path.join(out_dir, 'strings.json'), 'w',
+                 encoding='utf-8') as f:
+        f.write(json.dumps(table, ensure_ascii=False))
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+        json.dump({'version': FORMAT_VERSION,
+                   'images': len(cols['image_ids']),
+                   'objects': len(cols['object_ids']),
+                   'relationships': len(cols['relationship_ids']),
+                   'attributes': len(cols['attribute_ids'])}, f)
+
+
+def pack_scene_graphs(image_data_dir='data/by-id/',
+                      out_dir='data/scene_graphs.packed/'):
+    """
+    Pack the scene graph jsons saved by `local.save_scene_graphs_by_id`
+    into a columnar store in `out_dir`.
+    """
+    def records():
+        image_ids = local.get_scene_graph_ids(image_data_dir)
+        for image_id in image_ids:
+            fname = os.path.join(image_data_dir, str(image_id) + '.json')
+            with open(fname, 'rb') as f:
+                yield jsonlib.load(f)
+
+    write_scene_graphs(records(), out_dir)
+
+
+def pack_scene_graphs_file(data_dir='data/',
+                           out_dir='data/scene_graphs.packed/'):
+    """
+    Pack `scene_graphs.json` into a columnar store in `out_dir`, streaming
+    the file one scene graph at a time.
+    """
+    with io.open(os.path.join(data_dir, 'scene_graphs.json'), 'r',
+                 encoding='utf-8') as f:
+        write_scene_graphs(utils.iter_json_array(f), out_dir)
+
+
+class PackedSceneGraphs:
+    """
+    Read-only, memory-mapped view of a store written by `write_scene_graphs`.
+      path         string, directory of the store
+      images       dict of image id -> `Image`, or a data directory whose
+                   image catalog is used, as in `local.get_scene_graph`
+      synset_file  string, `synsets.json` used to turn synset names into
+                   `Synset` objects, or None to keep the names
+    """
+
+    def __init__(self, path='data/scene_graphs.packed/', images='data/',
+                 synset_file='data/synsets.json'):
+        require_numpy(__name__)
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            self.meta = jsonlib.load(f)
+        if self.meta['version'] != FORMAT_VERSION:
+            raise ValueError('Unsupported columnar store version %s'
+                             % self.meta['version'])
+        with io.open(os.path.join(path, 'strings.json'), 'r',
+                     encoding='utf-8') as f:
+            self.strings = jsonlib.load(f)
+        self._arrays = {}
+        for fname in os.listdir(path):
+            if fname.endswith('.npy'):
+                self._arrays[fname[:-4]] = np.load(os.path.join(path, fname),
+                                                   mmap_mode='r')
+        if type(images) is str:
+            images = local.get_image_catalog(images)
+        self.images = images
+        self.synset_file = synset_file
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['_arrays'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __len__(self):
+        return len(self.image_ids)
+
+    def __contains__(self, image_id):
+        return self.row(image_id) is not None
+
+    def row(self, image_id):
+        """
+        Get the row of `image_id` in the per-image columns, or None.
+        """
+        ids = self.image_index_ids
+        pos = int(np.searchsorted(ids, image_id))
+        if pos < len(ids) and ids[pos] == image_id:
+            return int(self.image_index_rows[pos])
+        return None
+
+    def relationship_counts(self):
+        """
+        Get the number of relationships of every image, row by row.
+        """
+        return np.diff(self.relationship_offsets)
+
+    def _string_lists(self, name, start, end):
+        offsets = self._arrays[name + '_offsets'][start:end + 1].tolist()
+        values = self._arrays[name][offsets[0]:offsets[-1]].tolist()
+        first = offsets[0]
+        strings = self.strings
+        return [[strings[v] for v in values[a - first:b - first]]
+                for a, b in zip(offsets, offsets[1:])]
+
+    def get_scene_graph(self, image_id):
+        """
+        Build the `Graph` of `image_id` from its slices of the store.
+        """
+        row = self.row(image_id)
+        if row is None:
+            raise KeyError(image_id)
+        if self.synset_file is not None:
+            syn_class = local.load_synsets(self.synset_file)
+
+            def synsets(names):
+                return [syn_class[sn] for sn in names]
+        else:
+            def synsets(names):
+                return names
+
+        o_start, o_end = self.object_offsets[row:row + 2].tolist()
+        objects = []
+        for oid, box, names, syns, attrs in zip(
+                self.object_ids[o_start:o_end].tolist(),
+                self.object_boxes[o_start:o_end].tolist(),
+                self._string_lists('object_names', o_start, o_end),
+                self._string_lists('object_synsets', o_start, o_end),
+                self._string_lists('object_attributes', o_start, o_end)):
+            object_ = Object(oid, box[0], box[1], box[2], box[3], names,
+                             synsets(syns))
+            object_.attributes = attrs
+            objects.append(object_)
+
+        r_start, r_end = self.relationship_offsets[row:row + 2].tolist()
+        relationships = []
+        for rid, s, p, o, syns in zip(
+                self.relationship_ids[r_start:r_end].tolist(),
+                self.relationship_subjects[r_start:r_end].tolist(),
+                self.relationship_predicates[r_start:r_end].tolist(),
+                self.relationship_objects[r_start:r_end].tolist(),
+                self._string_lists('relationship_synsets', r_start, r_end)):
+            relationships.append(Relationship(
+                rid, objects[s - o_start], self.strings[p],
+                objects[o - o_start], synsets(syns)))
+
+        a_start, a_end = self.attribute_offsets[row:row + 2].tolist()
+        attributes = []
+        for aid, o, values, syns in zip(
+                self.attribute_ids[a_start:a_end].tolist(),
+                self.attribute_objects[a_start:a_end].tolist(),
+                self._string_lists('attribute_values', a_start, a_end),
+                self._string_lists('attribute_synsets', a_start, a_end)):
+            attributes.append(Attribute(aid, objects[o - o_start], values,
+                                        synsets(syns)))
+
+        return Graph(self.images[image_id], objects, relationships,
+                     attributes)
@@ -0,0 +1,292 @@
+"""
+Visual Genome Python API wrapper, dataset downloader
+
+Downloads the dataset archives that `data/get*.sh` fetch with wget, all
+files at once and each one in byte ranges fetched in parallel. Progress is
+kept next to the partial file, so an interrupted download resumes with the
+ranges it is missing as long as the server copy has not changed. Archives
+are checked against their size and, if given, a checksum, then decompressed
+member by member to disk and removed.
+
+    python -m visual_genome.download --data-dir data/
+    python -m visual_genome.download --base-url http://localhost:8000/ \\
+        --files image_data.json.zip
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import shutil
+import threading
+import zipfile
+import visual_genome.utils as utils
+from visual_genome import client, jsonlib
+
+DATASET_URL = 'http://visualgenome.org/static/data/dataset/'
+
+# Archives fetched by the `data/get*.sh` scripts.
+DEFAULT_FILES = ('image_data.json.zip', 'region_descriptions.json.zip',
+                 'question_answers.json.zip')
+
+CHUNK_SIZE = 16 * 2 ** 20
+PART_SUFFIX = '.part'
+STATE_SUFFIX = '.part.json'
+
+
+class DownloadError(IOError):
+    """
+    A download could not be completed or did not verify.
+    """
+
+
+def _probe(session, url, timeout):
+    """
+    Get the size of `url` (None if unknown), whether byte ranges can be
+    requested and its validators, with a one byte ranged GET.
+    """
+    response = session.get(url, headers={'Range': 'bytes=0-0'}, stream=True,
+                           timeout=timeout)
+    try:
+        if response.status_code == 206:
+            total = response.headers.get('Content-Range', '').split('/')[-1]
+            size = int(total) if total.isdigit() else None
+            ranges = size is not None
+        elif response.status_code == 200:
+            length = response.headers.get('Content-Length')
+            size = int(length) if length is not None else None
+            ranges = False
+        else:
+            raise DownloadError('GET %s returned %d'
+                                % (url, response.status_code))
+        return size, ranges, {'etag': response.headers.get('ETag'),
+                              'last_modified':
+                                  response.headers.get('Last-Modified')}
+    finally:
+        response.close()
+
+
+def _copy_response(response, f, expected=None):
+    written = 0
+    for block in response.iter_content(2 ** 20):
+        f.write(block)
+        written += len(block)
+    if expected is not None and written != expected:
+        raise DownloadError('Got %d bytes of %s, expected %d'
+                            % (written, response.url, expected))
+    return written
+
+
+def verify_checksum(fname, checksum):
+    """
+    Check `fname` against `checksum`, 'algorithm:hexdigest' (e.g.
+    'sha256:...'; a bare digest is taken as sha256).
+    """
+    algorithm, _, digest = checksum.rpartition(':')
+    hasher = hashlib.new(algorithm or 'sha256')
+    with open(fname, 'rb') as f:
+        for block in iter(lambda: f.read(2 ** 20), b''):
+            hasher.update(block)
+    if hasher.hexdigest() != digest.lower():
+        raise DownloadError('%s does not match its %s checksum'
+                            % (fname, algorithm or 'sha256'))
+
+
+def download_file(url, dest, session=None, workers=8, chunk_size=CHUNK_SIZE,
+                  checksum=None, timeout=(5, 60), executor=None):
+    """
+    Download `url` to `dest` in `chunk_size` byte ranges, `workers` at a
+    time (or on `executor`), resuming a previous attempt if the server copy
+    did not change. Servers without range support are read in one stream.
+    Returns `dest`.
+    """
+    if session is None:
+        session = client.Client(timeout=timeout).session
+    part = dest + PART_SUFFIX
+    state_file = dest + STATE_SUFFIX
+    size, ranges, validators = _probe(session, url, timeout)
+
+    state = None
+    if os.path.exists(state_file) and os.path.exists(part):
+        with open(state_file, 'r') as f:
+            state = jsonlib.load(f)
+        if (state['size'], state['chunk_size'], state['validators']) != \
+                (size, chunk_size, validators) or validators == \
+                {'etag': None, 'last_modified': None}:
+            # The server copy changed, or cannot be told apart from another.
+            state = None
+    if state is None:
+        state = {'size': size, 'chunk_size': chunk_size,
+                 'validators': validators, 'done': []}
+        with open(part, 'wb') as f:
+            if size is not None and ranges:
+                f.truncate(size)
+
+    if not ranges or not size:
+        response = session.get(url, stream=True, timeout=timeout)
+        try:
+            if response.status_code != 200:
+                raise DownloadError('GET %s returned %d'
+                                    % (url, response.status_code))
+            with open(part, 'wb') as f:
+                _copy_response(response, f, size)
+        finally:
+            response.close()
+    else:
+        n_chunks = (size + chunk_size - 1) // chunk_size
+        done = set(state['done'])
+        lock = threading.Lock()
+        headers = {}
+        if validators['etag'] is not None:
+            headers['If-Range'] = validators['etag']
+        elif validators['last_modified'] is not None:
+            headers['If-Range'] = validators['last_modified']
+
+        def fetch(index):
+            start = index * chunk_size
+            end = min(start + chunk_size, size) - 1
+            response = session.get(
+                url, stream=True, timeout=timeout,
+                headers=dict(headers, Range='bytes=%d-%d' % (start, end)))
+            try:
+                if response.status_code != 206:
+                    raise DownloadError(
+                        'GET %s bytes %d-%d returned %d, the file may have '
+                        'changed' % (url, start, end, response.status_code))
+                with open(part, 'r+b') as f:
+                    f.seek(start)
+                    _copy_response(response, f, end - start + 1)
+            finally:
+                response.close()
+            with lock:
+                state['done'].append(index)
+                utils.write_atomic(state_file,
+                                   json.dumps(state).encode('utf-8'))
+
+        own_executor = executor is None
+        if own_executor:
+            executor = concurrent.futures.ThreadPoolExecutor(workers)
+        try:
+            futures = [executor.submit(fetch, index)
+                       for index in range(n_chunks) if index not in done]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+        finally:
+            if own_executor:
+                executor.shutdown(wait=False)
+
+    if size is not None and os.path.getsize(part) != size:
+        raise DownloadError('%s has %d bytes, expected %d'
+                            % (part, os.path.getsize(part), size))
+    if checksum is not None:
+        try:
+            verify_checksum(part, checksum)
+        except DownloadError:
+            os.remove(part)
+            if os.path.exists(state_file):
+                os.remove(state_file)
+            raise
+    os.replace(part, dest)
+    if os.path.exists(state_file):
+        os.remove(state_file)
+    return dest
+
+
+def extract(archive, out_dir, remove=True):
+    """
+    Decompress every file of the zip `archive` into `out_dir`, streaming
+    each member to disk, and return their paths. The archive is deleted
+    afterwards unless remove=False.
+    """
+    root = os.path.realpath(out_dir)
+    paths = []
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            path = os.path.realpath(os.path.join(root, info.filename))
+            if not path.startswith(root + os.sep):
+                raise DownloadError('%s has an entry outside of the output '
+                                    'directory: %s' % (archive,
+                                                       info.filename))
+            if not os.path.exists(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with zf.open(info) as src, open(path + '.tmp', 'wb') as dst:
+                shutil.copyfileobj(src, dst, 2 ** 20)
+            os.replace(path + '.tmp', path)
+            paths.append(path)
+    if remove:
+        os.remove(archive)
+    return paths
+
+
+def download_dataset(data_dir='data/', files=DEFAULT_FILES,
+                     base_url=DATASET_URL, workers=8, chunk_size=CHUNK_SIZE,
+                     checksums=None, unzip=True, keep_archives=False,
+                     force=False):
+    """
+    Download the dataset `files` from `base_url` into `data_dir`, all at
+    once, sharing `workers` connections for their byte ranges. Returns a
+    dict of file name -> paths of the files it produced.
+
+    checksums : dict of file name -> 'algorithm:hexdigest'
+    unzip : decompress the .zip archives once downloaded
+    force : download files whose extracted content is already present
+    """
+    checksums = checksums or {}
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+    base_url = base_url.rstrip('/') + '/'
+    http = client.Client(base_url=base_url, pool_maxsize=max(workers, 4))
+    chunk_executor = concurrent.futures.ThreadPoolExecutor(workers)
+
+    def fetch(name):
+        dest = os.path.join(data_dir, name)
+        target = dest[:-4] if unzip and name.endswith('.zip') else dest
+        if os.path.exists(target) and not force:
+            return [target]
+        if not os.path.exists(dest) or force:
+            download_file(base_url + name, dest, http.session,
+                          chunk_size=chunk_size, checksum=checksums.get(name),
+                          timeout=http.timeout, executor=chunk_executor)
+        if unzip and name.endswith('.zip'):
+            return extract(dest, data_dir, remove=not keep_archives)
+        return [dest]
+
+    file_executor = concurrent.futures.ThreadPoolExecutor(max(len(files), 1))
+    try:
+        futures = {name: file_executor.submit(fetch, name) for name in files}
+        return {name: future.result() for name, future in futures.items()}
+    finally:
+        file_executor.shutdown(wait=False)
+        chunk_executor.shutdown(wait=False)
+        http.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Download the Visual '
+                                     'Genome dataset files.')
+    parser.add_argument('--data-dir', default='data/')
+    parser.add_argument('--base-url', default=DATASET_URL)
+    parser.add_argument('--files', nargs='+', default=DEFAULT_FILES)
+    parser.add_argument('--workers', type=int, default=8,
+                        help='byte ranges downloaded at once, over all files')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--checksum', action='append', default=[],
+                        metavar='FILE=ALGORITHM:DIGEST')
+    parser.add_argument('--no-unzip', action='store_true')
+    parser.add_argument('--keep-archives', action='store_true')
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args(argv)
+
+    checksums = dict(item.split('=', 1) for item in args.checksum)
+    paths = download_dataset(args.data_dir, args.files, args.base_url,
+                             args.workers, args.chunk_size, checksums,
+                             not args.no_unzip, args.keep_archives,
+                             args.force)
+    for name in args.files:
+        print('%s: %s' % (name, ', '.join(paths[name])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Visual Genome Python API wrapper, JSON decoding
+
+Every JSON document the package reads whole (API responses, `by-id/`
+scene graphs, synsets, dump records) is decoded by `loads`, which uses the
+fastest installed backend: orjson, ujson, simdjson, then the standard
+library. Set the VISUAL_GENOME_JSON environment variable or call
+`set_backend` to choose one.
+
+Streaming readers (`utils.iter_json_array`) keep using the standard
+library, whose `raw_decode` is the only one that can decode a value in the
+middle of a buffer and tell where it ended.
+"""
+import json
+import os
+
+BACKENDS = ('orjson', 'ujson', 'simdjson', 'json')
+
+
+def _import_backend(name):
+    """
+    Get the `loads` function of backend `name`, or None if it is not
+    installed.
+    """
+    if name not in BACKENDS:
+        raise ValueError('Unknown JSON backend %r, expected one of %s'
+                         % (name, ', '.join(BACKENDS)))
+    if name == 'json':
+        return json.loads
+    try:
+        module = __import__(name)
+    except ImportError:
+        return None
+    return module.loads
+
+
+def available_backends():
+    """
+    Get the names of the installed backends, fastest first.
+    """
+    return [name for name in BACKENDS if _import_backend(name) is not None]
+
+
+_backend = None
+_loads = None
+
+
+def set_backend(name=None):
+    """
+    Decode with backend `name`, or the fastest installed one if None.
+    Returns the name of the previous backend.
+    """
+    global _backend, _loads
+    if name is None:
+        name = os.environ.get('VISUAL_GENOME_JSON') or \
+            available_backends()[0]
+    loads_ = _import_backend(name)
+    if loads_ is None:
+        raise ImportError('JSON backend %s is not installed' % name)
+    previous = _backend
+    _backend, _loads = name, loads_
+    return previous
+
+
+def get_backend():
+    """
+    Get the name of the backend in use.
+    """
+    if _backend is None:
+        set_backend()
+    return _backend
+
+
+def loads(data):
+    """
+    Decode a JSON document given as str or UTF-8 bytes.
+    """
+    if _loads is None:
+        set_backend()
+    return _loads(data)
+
+
+def load(f):
+    """
+    Decode the JSON document in the file object `f`, opened in text or
+    binary mode.
+    """
+    return loads(f.read())
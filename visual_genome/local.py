@@ -1,58 +1,309 @@
 
 import os
-import gc
+import io
 import json
+import array
+import bisect
+import collections
+import collections.abc
+import concurrent.futures
+import functools
+import multiprocessing
 import visual_genome.utils as utils
+from visual_genome import jsonlib, metrics
 from visual_genome.models import (Image, Object, Attribute, Relationship,
                                   Graph, Synset)
 
 
+def iter_image_data(data_dir=None):
+    """
+    Iterate over the images in `image_data.json`, parsing one at a time.
+    """
+    if data_dir is None:
+        data_dir = utils.get_data_dir()
+    data_file = os.path.join(data_dir, 'image_data.json')
+    with io.open(data_file, 'r', encoding='utf-8') as f:
+        for image in utils.iter_json_array(f):
+            yield utils.parse_image_data(image)
+
+
 def get_all_image_data(data_dir=None):
     """
-    Get Image ids from start_index to end_index.
+    Get all images in `image_data.json`.
+    """
+    return list(iter_image_data(data_dir))
+
+
+class ImageCatalog(collections.abc.Mapping):
+    """
+    Read-only dict of image id -> `Image` for an `image_data.json` file.
+      data_file  string, path of `image_data.json`
+      compact    bool, keep the images as arrays and build `Image` objects
+                 when they are looked up, instead of keeping `Image` objects
+    """
+
+    def __init__(self, data_file, compact=False):
+        self.data_file = data_file
+        self.source = _dump_source(data_file)
+        self.compact = compact
+        with io.open(data_file, 'r', encoding='utf-8') as f:
+            images = (utils.parse_image_data(image)
+                      for image in utils.iter_json_array(f))
+            if not compact:
+                self._images = {img.id: img for img in images}
+                return
+            cols = {name: array.array('q') for name in (
+                'ids', 'widths', 'heights', 'coco_ids', 'flickr_ids',
+                'url_offsets')}
+            cols['url_offsets'].append(0)
+            urls = []
+            url_length = 0
+            for img in images:
+                cols['ids'].append(img.id)
+                cols['widths'].append(img.width)
+                cols['heights'].append(img.height)
+                # Missing coco and flickr ids are stored as -1.
+                cols['coco_ids'].append(
+                    -1 if img.coco_id is None else img.coco_id)
+                cols['flickr_ids'].append(
+                    -1 if img.flickr_id is None else img.flickr_id)
+                urls.append(img.url)
+                url_length += len(img.url)
+                cols['url_offsets'].append(url_length)
+        self._cols = cols
+        self._urls = ''.join(urls)
+        order = sorted(range(len(cols['ids'])), key=cols['ids'].__getitem__)
+        self._sorted_ids = array.array('q', (cols['ids'][i] for i in order))
+        self._sorted_rows = array.array('q', order)
+
+    def __getitem__(self, image_id):
+        if not self.compact:
+            return self._images[image_id]
+        pos = bisect.bisect_left(self._sorted_ids, image_id)
+        if pos == len(self._sorted_ids) or self._sorted_ids[pos] != image_id:
+            raise KeyError(image_id)
+        row = self._sorted_rows[pos]
+        cols = self._cols
+        coco_id = cols['coco_ids'][row]
+        flickr_id = cols['flickr_ids'][row]
+        url_offsets = cols['url_offsets']
+        url = self._urls[url_offsets[row]:url_offsets[row + 1]]
+        return Image(image_id, url, cols['widths'][row], cols['heights'][row],
+                     None if coco_id == -1 else coco_id,
+                     None if flickr_id == -1 else flickr_id)
+
+    def __iter__(self):
+        if not self.compact:
+            return iter(self._images)
+        return iter(self._cols['ids'])
+
+    def __len__(self):
+        if not self.compact:
+            return len(self._images)
+        return len(self._cols['ids'])
+
+    def is_stale(self):
+        """
+        Whether `image_data.json` changed since the catalog was built.
+        """
+        return _dump_source(self.data_file) != self.source
+
+
+# Catalogs built by `get_image_catalog`, keyed by (absolute path, compact).
+_image_catalogs = {}
+
+
+def get_image_catalog(data_dir=None, compact=False):
+    """
+    Get the `ImageCatalog` of `data_dir`, shared by every local loader in
+    the process. It is built on first use and again if `image_data.json`
+    changes.
     """
     if data_dir is None:
         data_dir = utils.get_data_dir()
-    dataFile = os.path.join(data_dir, 'image_data.json')
-    data = json.load(open(dataFile))
-    return [utils.parse_image_data(image) for image in data]
+    data_file = os.path.abspath(os.path.join(data_dir, 'image_data.json'))
+    catalog = _image_catalogs.get((data_file, compact))
+    if catalog is None or catalog.is_stale():
+        catalog = ImageCatalog(data_file, compact)
+        _image_catalogs[(data_file, compact)] = catalog
+    return catalog
 
 
-def get_all_region_descriptions(data_dir=None):
+def iter_region_descriptions(data_dir=None, images=None):
     """
-    Get all region descriptions.
+    Iterate over the region descriptions, yielding the list of regions of
+    one image at a time.
+    images : dict of image id -> `Image`; defaults to the image catalog
+             of `data_dir`
     """
     if data_dir is None:
         data_dir = utils.get_data_dir()
     data_file = os.path.join(data_dir, 'region_descriptions.json')
-    image_data = get_all_image_data(data_dir)
-    image_map = {}
-    for d in image_data:
-        image_map[d.id] = d
-    images = json.load(open(data_file))
-    output = []
-    for image in images:
-        output.append(utils.parse_region_descriptions(
-            image['regions'], image_map[image['id']]))
-    return output
+    if images is None:
+        images = get_image_catalog(data_dir)
+    with io.open(data_file, 'r', encoding='utf-8') as f:
+        for image in utils.iter_json_array(f):
+            yield utils.parse_region_descriptions(
+                image['regions'], images[image['id']])
 
 
-def get_all_qas(data_dir=None):
+def get_all_region_descriptions(data_dir=None, images=None):
     """
-    Get all question answers.
+    Get all region descriptions.
+    """
+    return list(iter_region_descriptions(data_dir, images))
+
+
+def iter_qas(data_dir=None, images=None):
+    """
+    Iterate over the question answers, yielding the list of QAs of one
+    image at a time.
+    images : dict of image id -> `Image`; defaults to the image catalog
+             of `data_dir`
     """
     if data_dir is None:
         data_dir = utils.get_data_dir()
     data_file = os.path.join(data_dir, 'question_answers.json')
-    image_data = get_all_image_data(data_dir)
-    image_map = {}
-    for d in image_data:
-        image_map[d.id] = d
-    images = json.load(open(data_file))
-    output = []
-    for image in images:
-        output.append(utils.parse_QA(image['qas'], image_map))
-    return output
+    if images is None:
+        images = get_image_catalog(data_dir)
+    with io.open(data_file, 'r', encoding='utf-8') as f:
+        for image in utils.iter_json_array(f):
+            yield utils.parse_QA(image['qas'], images)
+
+
+def get_all_qas(data_dir=None, images=None):
+    """
+    Get all question answers.
+    """
+    return list(iter_qas(data_dir, images))
+
+
+# --------------------------------------------------------------------------------------------------
+# Point lookups in the dumps, through an index of the byte span of each
+# image's record saved next to the dump as `<dump>.idx`.
+
+INDEX_SUFFIX = '.idx'
+
+# Loaded indexes, keyed by absolute dump path: (source, image id -> span).
+_dump_indexes = {}
+
+
+def _record_image_id(record):
+    return record['image_id'] if 'image_id' in record else record['id']
+
+
+def _dump_source(data_file):
+    stat = os.stat(data_file)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def index_dump(data_file):
+    """
+    Record the byte offset and length of every image's record in the JSON
+    dump `data_file` (e.g. `region_descriptions.json`) in `<data_file>.idx`.
+    This reads the whole dump once, one record at a time.
+    """
+    source = _dump_source(data_file)
+    ids = []
+    offsets = []
+    lengths = []
+    with open(data_file, 'rb') as f:
+        for start, end, _, record in utils.iter_json_array_records(f):
+            ids.append(_record_image_id(record))
+            offsets.append(start)
+            lengths.append(end - start)
+    utils.write_atomic(data_file + INDEX_SUFFIX, json.dumps(
+        {'source': source, 'ids': ids, 'offsets': offsets,
+         'lengths': lengths}).encode('utf-8'))
+    index = dict(zip(ids, zip(offsets, lengths)))
+    _dump_indexes[os.path.abspath(data_file)] = (source, index)
+    return index
+
+
+def load_dump_index(data_file):
+    """
+    Get the dict of image id -> (offset, length) of the records in the
+    dump `data_file`, building its `.idx` file if it is missing or older
+    than the dump.
+    """
+    path = os.path.abspath(data_file)
+    source = _dump_source(path)
+    entry = _dump_indexes.get(path)
+    if entry is not None and entry[0] == source:
+        return entry[1]
+    if os.path.exists(path + INDEX_SUFFIX):
+        with open(path + INDEX_SUFFIX, 'r') as f:
+            saved = jsonlib.load(f)
+        if saved['source'] == source:
+            index = dict(zip(saved['ids'],
+                             zip(saved['offsets'], saved['lengths'])))
+            _dump_indexes[path] = (source, index)
+            return index
+    return index_dump(path)
+
+
+def read_dump_record(data_file, image_id):
+    """
+    Read and parse the record of `image_id` in the dump `data_file` without
+    reading the rest of the file; None if the image is not in the dump.
+    """
+    span = load_dump_index(data_file).get(image_id)
+    if span is None:
+        return None
+    with open(data_file, 'rb') as f:
+        f.seek(span[0])
+        return jsonlib.loads(f.read(span[1]))
+
+
+def get_image_data(image_id, data_dir=None):
+    """
+    Get the image `image_id` from `image_data.json`, or None.
+    """
+    if data_dir is None:
+        data_dir = utils.get_data_dir()
+    data = read_dump_record(os.path.join(data_dir, 'image_data.json'),
+                            image_id)
+    if data is None:
+        return None
+    return utils.parse_image_data(data)
+
+
+def get_region_descriptions_of_image(image_id, data_dir=None, images=None):
+    """
+    Get the region descriptions of an image from `region_descriptions.json`,
+    or None.
+    images : dict of image id -> `Image`; by default the image is looked up
+             in `image_data.json` through its index
+    """
+    if data_dir is None:
+        data_dir = utils.get_data_dir()
+    data = read_dump_record(
+        os.path.join(data_dir, 'region_descriptions.json'), image_id)
+    if data is None:
+        return None
+    if images is None:
+        image = get_image_data(image_id, data_dir)
+    else:
+        image = images[image_id]
+    return utils.parse_region_descriptions(data['regions'], image)
+
+
+def get_qas_of_image(image_id, data_dir=None, images=None):
+    """
+    Get the question answers of an image from `question_answers.json`, or
+    None.
+    images : dict of image id -> `Image`; by default the image is looked up
+             in `image_data.json` through its index
+    """
+    if data_dir is None:
+        data_dir = utils.get_data_dir()
+    data = read_dump_record(os.path.join(data_dir, 'question_answers.json'),
+                            image_id)
+    if data is None:
+        return None
+    if images is None:
+        images = {image_id: get_image_data(image_id, data_dir)}
+    return utils.parse_QA(data['qas'], images)
 
 
 # --------------------------------------------------------------------------------------------------
@@ -61,56 +312,252 @@ def get_all_qas(data_dir=None):
 
 def get_scene_graph(image_id, images='data/',
                     image_data_dir='data/by-id/',
-                    synset_file='data/synsets.json'):
+                    synset_file='data/synsets.json', lazy=False):
     """
-    Load a single scene graph from a .json file.
+    Load a single scene graph from a .json file. With lazy=True, get a
+    `LazyGraph` that reads and parses the file on first use.
     """
     if type(images) is str:
         # Instead of a string, we can pass this dict as the argument `images`
-        images = {img.id: img for img in get_all_image_data(images)}
+        images = get_image_catalog(images)
+
+    if lazy:
+        fname = os.path.join(image_data_dir, str(image_id) + '.json')
+        return LazyGraph(images[image_id], fname, synset_file)
+    scene_graph = _load_graph_local(image_id, images, image_data_dir)
+    scene_graph = init_synsets(scene_graph, synset_file)
+    return scene_graph
 
+
+def _load_graph_local(image_id, images, image_data_dir):
+    """
+    Parse the scene graph of `image_id`, leaving its synsets as strings.
+    """
     fname = str(image_id) + '.json'
     image = images[image_id]
-    data = json.load(open(image_data_dir + fname, 'r'))
+    with open(os.path.join(image_data_dir, fname), 'rb') as f:
+        data = jsonlib.load(f)
+    return parse_graph_local(data, image)
+
+
+def _lazy_slot(slot):
+    """
+    Property over a `Graph` slot that parses the graph first.
+    """
+    def get(self):
+        if self._record is not None:
+            self._materialize()
+        return slot.__get__(self)
+
+    def set(self, value):
+        if self._record is not None:
+            self._materialize()
+        slot.__set__(self, value)
+
+    return property(get, set)
 
-    scene_graph = parse_graph_local(data, image)
-    scene_graph = init_synsets(scene_graph, synset_file)
-    return scene_graph
+
+class LazyGraph(Graph):
+    """
+    `Graph` that parses its objects, relationships and attributes the first
+    time one of them is used.
+      record              dict, the scene graph record, or string, the path
+                          of its .json file
+      synset_file         string, `synsets.json` to resolve synsets with, or
+                          None to keep them as strings
+      relationship_count  int, number of relationships if already known
+    """
+
+    __slots__ = ('_record', '_synset_file', '_relationship_count')
+
+    def __init__(self, image, record, synset_file=None,
+                 relationship_count=None):
+        self.image = image
+        self._spatial_index = None
+        self._record = record
+        self._synset_file = synset_file
+        self._relationship_count = relationship_count
+
+    objects = _lazy_slot(Graph.objects)
+    relationships = _lazy_slot(Graph.relationships)
+    attributes = _lazy_slot(Graph.attributes)
+
+    @property
+    def materialized(self):
+        return self._record is None
+
+    @property
+    def relationship_count(self):
+        """
+        Number of relationships, without parsing the graph if it is known.
+        """
+        if self._record is None or self._relationship_count is None:
+            return len(self.relationships)
+        return self._relationship_count
+
+    def _materialize(self):
+        record = self._record
+        if type(record) is str:
+            with open(record, 'rb') as f:
+                record = jsonlib.load(f)
+        graph = parse_graph_local(record, self.image)
+        if self._synset_file is not None:
+            init_synsets(graph, self._synset_file)
+        Graph.objects.__set__(self, graph.objects)
+        Graph.relationships.__set__(self, graph.relationships)
+        Graph.attributes.__set__(self, graph.attributes)
+        self._record = None
+
+
+# Relationship counts of the scene graph jsons of a directory, stored in it
+# as {image id: [size, mtime, count]} by `get_relationship_counts`.
+RELATIONSHIP_COUNTS_FILE = '.relationship_counts.json'
+
+
+def _count_relationships(data):
+    """
+    Number of relationships `parse_graph_local` keeps from a record.
+    """
+    object_ids = set(obj['object_id'] for obj in data['objects'])
+    return sum(1 for rel in data['relationships']
+               if rel['subject_id'] in object_ids and
+               rel['object_id'] in object_ids)
+
+
+def get_relationship_counts(image_data_dir='data/by-id/', image_ids=None):
+    """
+    Get a dict of image id -> number of relationships of the scene graph
+    jsons in `image_data_dir` (or of `image_ids` only). Counts are kept in
+    `RELATIONSHIP_COUNTS_FILE` and only recomputed for files that changed.
+    """
+    if image_ids is None:
+        image_ids = get_scene_graph_ids(image_data_dir)
+    counts_file = os.path.join(image_data_dir, RELATIONSHIP_COUNTS_FILE)
+    saved = {}
+    if os.path.exists(counts_file):
+        with open(counts_file, 'r') as f:
+            saved = jsonlib.load(f)
+    counts = {}
+    changed = False
+    for image_id in image_ids:
+        fname = os.path.join(image_data_dir, str(image_id) + '.json')
+        source = _dump_source(fname)
+        entry = saved.get(str(image_id))
+        if entry is None or entry[:2] != [source['size'], source['mtime']]:
+            with open(fname, 'rb') as f:
+                entry = [source['size'], source['mtime'],
+                         _count_relationships(jsonlib.load(f))]
+            saved[str(image_id)] = entry
+            changed = True
+        counts[image_id] = entry[2]
+    if changed:
+        utils.write_atomic(counts_file, json.dumps(saved).encode('utf-8'))
+    return counts
 
 
 def get_scene_graphs(start_index=0, end_index=-1,
                      data_dir='data/', image_data_dir='data/by-id/',
-                     min_rels=0, max_rels=100):
+                     min_rels=0, max_rels=100, workers=None, chunksize=64,
+                     images=None, lazy=False):
     """
     Get scene graphs given locally stored .json files;
     requires `save_scene_graphs_by_id`.
 
-    start_index, end_index : get scene graphs listed by image,
+    start_index, end_index : get scene graphs listed by image id,
                            from start_index through end_index
     data_dir : directory with `image_data.json` and `synsets.json`
     image_data_dir : directory of scene graph jsons saved by image id
                    (see `save_scene_graphs_by_id`)
     min_rels, max_rels: only get scene graphs with at least / less
                       than this number of relationships
+    workers : number of processes parsing the scene graphs in parallel;
+              None or 1 parses them in this process
+    chunksize : number of scene graphs sent to a worker at a time
+    images : dict of image id -> `Image`; defaults to the image catalog
+             of `data_dir`
+    lazy : get `LazyGraph`s that are parsed on first use, filtered by the
+           counts of `get_relationship_counts`; `workers` is then unused
     """
-    images = {img.id: img for img in get_all_image_data(data_dir)}
+    if images is None:
+        images = get_image_catalog(data_dir)
+    synset_file = os.path.join(data_dir, 'synsets.json')
     scene_graphs = []
 
-    img_fnames = os.listdir(image_data_dir)
+    image_ids = get_scene_graph_ids(image_data_dir)
     if (end_index < 1):
-        end_index = len(img_fnames)
-
-    for fname in img_fnames[start_index: end_index]:
-        image_id = int(fname.split('.')[0])
-        scene_graph = get_scene_graph(
-            image_id, images, image_data_dir, data_dir + 'synsets.json')
-        n_rels = len(scene_graph.relationships)
-        if (min_rels <= n_rels <= max_rels):
-            scene_graphs.append(scene_graph)
+        end_index = len(image_ids)
+    image_ids = image_ids[start_index: end_index]
+
+    if lazy:
+        counts = get_relationship_counts(image_data_dir, image_ids)
+        for image_id in image_ids:
+            n_rels = counts[image_id]
+            if (min_rels <= n_rels <= max_rels):
+                fname = os.path.join(image_data_dir, str(image_id) + '.json')
+                scene_graphs.append(LazyGraph(images[image_id], fname,
+                                              synset_file, n_rels))
+        return scene_graphs
+
+    if workers is None or workers <= 1:
+        results = map(functools.partial(
+            _load_scene_graph_filtered, images=images,
+            image_data_dir=image_data_dir, min_rels=min_rels,
+            max_rels=max_rels), image_ids)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(
+            workers, _init_scene_graph_worker,
+            (images, image_data_dir, min_rels, max_rels))
+        results = pool.imap(_load_scene_graph_worker, image_ids, chunksize)
+
+    try:
+        for scene_graph in results:
+            if scene_graph is None:
+                continue
+            # Graphs coming back from a worker hold a copy of their image.
+            scene_graph.image = images[scene_graph.image.id]
+            scene_graphs.append(init_synsets(scene_graph, synset_file))
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
 
     return scene_graphs
 
 
+def _load_scene_graph_filtered(image_id, images, image_data_dir, min_rels,
+                               max_rels):
+    """
+    Parse one scene graph, returning None if it is filtered out by its
+    number of relationships.
+    """
+    scene_graph = _load_graph_local(image_id, images, image_data_dir)
+    n_rels = len(scene_graph.relationships)
+    if (min_rels <= n_rels <= max_rels):
+        return scene_graph
+    return None
+
+
+# Arguments shared by every call to `_load_scene_graph_worker` in a pool
+# process of `get_scene_graphs`; only set by the pool initializer.
+_scene_graph_worker = {}
+
+
+def _init_scene_graph_worker(images, image_data_dir, min_rels, max_rels):
+    """
+    Set up a pool process to load scene graphs for `get_scene_graphs`.
+    """
+    _scene_graph_worker.update(images=images, image_data_dir=image_data_dir,
+                               min_rels=min_rels, max_rels=max_rels)
+
+
+def _load_scene_graph_worker(image_id):
+    """
+    `_load_scene_graph_filtered` with the arguments of this pool process.
+    """
+    return _load_scene_graph_filtered(image_id, **_scene_graph_worker)
+
+
 def map_object(object_map, obj):
     """
     Use object ids as hashes to `visual_genome.models.Object` instances.
@@ -148,6 +595,7 @@ global count_skips
 count_skips = [0, 0]
 
 
+@metrics.timed
 def parse_graph_local(data, image, verbose=False):
     """
     Modified version of `utils.ParseGraph`.
@@ -191,20 +639,52 @@ def parse_graph_local(data, image, verbose=False):
     return Graph(image, objects, relationships, attributes)
 
 
+# Synsets parsed from `synsets.json`, keyed by absolute file path. Each entry
+# holds the file's mtime and a dict of synset name -> canonical `Synset`.
+_synset_registry = {}
+
+
+def load_synsets(synset_file):
+    """
+    Get a dict of synset name -> `Synset` for `synset_file`.
+
+    The file is only parsed the first time it is requested, or again once it
+    has been modified; every caller in the process shares the same dict, so
+    there is a single `Synset` instance per name.
+    """
+    path = os.path.abspath(synset_file)
+    mtime = os.path.getmtime(path)
+    entry = _synset_registry.get(path)
+    if entry is not None and entry[0] == mtime:
+        return entry[1]
+
+    previous = entry[1] if entry is not None else {}
+    with open(path, 'rb') as f:
+        syn_data = jsonlib.load(f)
+    syn_class = {}
+    for s in syn_data:
+        name = s['synset_name']
+        synset = previous.get(name)
+        # Keep handing out the old instance if the synset did not change.
+        if synset is None or synset.definition != s['synset_definition']:
+            synset = Synset(name, s['synset_definition'])
+        syn_class[name] = synset
+    _synset_registry[path] = (mtime, syn_class)
+    return syn_class
+
+
 def init_synsets(scene_graph, synset_file):
     """
     Convert synsets in a scene graph from strings to Synset objects.
     """
-    syn_data = json.load(open(synset_file, 'r'))
-    syn_class = {s['synset_name']: Synset(
-        s['synset_name'], s['synset_definition']) for s in syn_data}
+    syn_class = load_synsets(synset_file)
 
     for obj in scene_graph.objects:
         obj.synsets = [syn_class[sn] for sn in obj.synsets]
     for rel in scene_graph.relationships:
         rel.synset = [syn_class[sn] for sn in rel.synset]
     for attr in scene_graph.attributes:
-        obj.synset = [syn_class[sn] for sn in attr.synset]
+        attr.synset = [syn_class[sn] for sn in attr.synset]
 
     return scene_graph
 
@@ -215,17 +695,29 @@ def init_synsets(scene_graph, synset_file):
 #     https://drive.google.com/file/d/0Bygumy5BKFtcQ1JrcFpyQWdaQWM
 
 
-def save_scene_graphs_by_id(data_dir='data/', image_data_dir='data/by-id/'):
+# Name of the file `save_scene_graphs_by_id` records its progress in.
+SAVE_PROGRESS_FILE = '.save_scene_graphs_by_id.json'
+
+
+def save_scene_graphs_by_id(data_dir='data/', image_data_dir='data/by-id/',
+                            workers=None, resume=True,
+                            checkpoint_every=1000):
     """
     Save a separate .json file for each image id in `image_data_dir`.
 
     Notes
     -----
-    - If we don't save .json's by id, `scene_graphs.json` is >6G in RAM
+    - `scene_graphs.json` is streamed one scene graph at a time, rather
+      than being loaded in memory (>6G in RAM)
     - Separated .json files are ~1.1G on disk
     - Run `add_attrs_to_scene_graphs` before `parse_graph_local` will work
     - Attributes are only present in objects, and do not have synset info
 
+    workers : number of threads writing files; None writes them in turn
+    resume : continue from the progress recorded in `image_data_dir` by an
+             interrupted run over the same `scene_graphs.json`
+    checkpoint_every : number of files written between progress records
+
     Each output .json has the following keys:
       - "id"
       - "objects"
@@ -234,44 +726,140 @@ def save_scene_graphs_by_id(data_dir='data/', image_data_dir='data/by-id/'):
     if not os.path.exists(image_data_dir):
         os.mkdir(image_data_dir)
 
-    all_data = json.load(open(os.path.join(data_dir, 'scene_graphs.json')))
-    for sg_data in all_data:
+    data_file = os.path.join(data_dir, 'scene_graphs.json')
+    progress_file = os.path.join(image_data_dir, SAVE_PROGRESS_FILE)
+    source = _dump_source(data_file)
+    offset = 0
+    if resume and os.path.exists(progress_file):
+        with open(progress_file, 'r') as f:
+            progress = jsonlib.load(f)
+        if progress['source'] == source:
+            offset = progress['offset']
+
+    def checkpoint(end):
+        utils.write_atomic(progress_file, json.dumps(
+            {'source': source, 'offset': end}).encode('utf-8'))
+
+    def save(raw, sg_data):
         img_fname = str(sg_data['image_id']) + '.json'
-        with open(os.path.join(image_data_dir, img_fname), 'w') as f:
-            json.dump(sg_data, f)
-
-    del all_data
-    gc.collect()  # clear memory
+        utils.write_atomic(os.path.join(image_data_dir, img_fname), raw)
+
+    executor = None
+    if workers is not None and workers > 1:
+        executor = concurrent.futures.ThreadPoolExecutor(workers)
+    # Writes are retired in file order, so the checkpoint never gets ahead
+    # of a file that is still being written; the window bounds how many
+    # records are held in memory.
+    pending = collections.deque()
+    window = 0 if executor is None else 4 * workers
+    count = 0
+    end = offset
+    try:
+        with open(data_file, 'rb') as f:
+            for _, rec_end, raw, sg_data in utils.iter_json_array_records(
+                    f, offset):
+                if executor is None:
+                    save(raw, sg_data)
+                    pending.append((rec_end, None))
+                else:
+                    pending.append(
+                        (rec_end, executor.submit(save, raw, sg_data)))
+                while len(pending) > window:
+                    end, future = pending.popleft()
+                    if future is not None:
+                        future.result()
+                    count += 1
+                    if count % checkpoint_every == 0:
+                        checkpoint(end)
+        while pending:
+            end, future = pending.popleft()
+            future.result()
+        checkpoint(end)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def get_scene_graph_ids(image_data_dir):
+    """
+    Get the sorted image ids of the scene graph jsons in `image_data_dir`.
+    """
+    return sorted(int(fname[:-5]) for fname in os.listdir(image_data_dir)
+                  if fname.endswith('.json') and fname[:-5].isdigit())
 
 
-def add_attrs_to_scene_graphs(data_dir='data/'):
+def add_attrs_to_scene_graphs(data_dir='data/', image_data_dir=None):
     """
     Add attributes to `scene_graph.json`, extracted from `attributes.json`.
 
     This also adds a unique id to each attribute, and separates individual
     attibutes for each object (these are grouped in `attributes.json`).
-    """
-    attr_data = json.load(open(os.path.join(data_dir, 'attributes.json')))
-    with open(os.path.join(data_dir, 'scene_graphs.json')) as f:
-        sg_dict = {sg['image_id']: sg for sg in json.load(f)}
 
+    Neither file is loaded in memory: `attributes.json` is indexed by image
+    id, then `scene_graphs.json` is streamed and rewritten one scene graph
+    at a time, reading the attributes of each image from the index.
+
+    image_data_dir : if given, add the attributes to the jsons saved by
+                     `save_scene_graphs_by_id` in this directory instead,
+                     leaving `scene_graphs.json` untouched
+    """
+    attrs_file = os.path.join(data_dir, 'attributes.json')
+    if image_data_dir is not None:
+        id_count = 0
+        with io.open(attrs_file, 'r', encoding='utf-8') as f:
+            for img_attrs in utils.iter_json_array(f):
+                attrs, id_count = _split_attributes(img_attrs, id_count)
+                fname = os.path.join(image_data_dir,
+                                     str(img_attrs['image_id']) + '.json')
+                with open(fname, 'rb') as sg_f:
+                    sg = jsonlib.load(sg_f)
+                sg['attributes'] = attrs
+                utils.write_atomic(fname, json.dumps(sg).encode('utf-8'))
+        return
+
+    # image id -> byte span of its record and id of its first attribute.
+    index = {}
     id_count = 0
-    for img_attrs in attr_data:
-        attrs = []
-        for attribute in img_attrs['attributes']:
-            a = img_attrs.copy()
-            del a['attributes']
-            a['attribute'] = attribute
-            a['attribute_id'] = id_count
-            attrs.append(a)
-            id_count += 1
-        iid = img_attrs['image_id']
-        sg_dict[iid]['attributes'] = attrs
-
-    with open(os.path.join(data_dir, 'scene_graphs.json'), 'w') as f:
-        json.dump(sg_dict.values(), f)
-    del attr_data, sg_dict
-    gc.collect()
+    with open(attrs_file, 'rb') as f:
+        for start, end, _, img_attrs in utils.iter_json_array_records(f):
+            index[img_attrs['image_id']] = (start, end, id_count)
+            id_count += len(img_attrs['attributes'])
+
+    sg_file = os.path.join(data_dir, 'scene_graphs.json')
+    tmp_file = sg_file + '.tmp'
+    with open(attrs_file, 'rb') as attrs_f, \
+            io.open(sg_file, 'r', encoding='utf-8') as sg_f, \
+            open(tmp_file, 'w') as out:
+        out.write('[')
+        for i, sg in enumerate(utils.iter_json_array(sg_f)):
+            entry = index.get(sg['image_id'])
+            if entry is not None:
+                start, end, first_id = entry
+                attrs_f.seek(start)
+                raw = attrs_f.read(end - start)
+                img_attrs = jsonlib.loads(raw)
+                sg['attributes'], _ = _split_attributes(img_attrs, first_id)
+            if i > 0:
+                out.write(', ')
+            json.dump(sg, out)
+        out.write(']')
+    os.replace(tmp_file, sg_file)
+
+
+def _split_attributes(img_attrs, id_count):
+    """
+    Give the attributes of each object in an `attributes.json` record an
+    entry of their own, with ids counting from `id_count`.
+    """
+    attrs = []
+    for attribute in img_attrs['attributes']:
+        a = img_attrs.copy()
+        del a['attributes']
+        a['attribute'] = attribute
+        a['attribute_id'] = id_count
+        attrs.append(a)
+        id_count += 1
+    return attrs, id_count
 
 
 # --------------------------------------------------------------------------------------------------
@@ -283,13 +871,14 @@ def get_scene_graphs_VRD(json_file='data/vrd/json/test.json'):
     Load VRD dataset into scene graph format.
     """
     scene_graphs = []
-    with open(json_file, 'r') as f:
-        D = json.load(f)
+    with open(json_file, 'rb') as f:
+        D = jsonlib.load(f)
 
     scene_graphs = [parse_graph_VRD(d) for d in D]
     return scene_graphs
 
 
+@metrics.timed
 def parse_graph_VRD(d):
     image = Image(d['photo_id'], d['filename'], d[
                   'width'], d['height'], '', '')
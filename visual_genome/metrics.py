@@ -0,0 +1,177 @@
+"""
+Visual Genome Python API wrapper, instrumentation
+
+Opt-in timings of HTTP requests and of the `parse_*` helpers. Nothing is
+recorded until a listener is added: a callable taking (kind, name, fields),
+called after every event from the thread that ran it.
+  kind = 'request'  name is the endpoint, with ids replaced by {id}; fields
+                    are seconds (total), decode_seconds (JSON decoding),
+                    bytes, retries, status, cache ('hit', 'revalidated',
+                    'miss' or None without a cache) and error (exception
+                    name or None)
+  kind = 'parse'    name is the function; fields are seconds
+
+`collect` adds a `Metrics` listener for the duration of a block:
+
+    with metrics.collect() as m:
+        api.get_scene_graph_of_image(61512)
+    print(m.report())
+"""
+import contextlib
+import functools
+import re
+import threading
+import time
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+def add_listener(listener):
+    """
+    Call `listener(kind, name, fields)` after every event.
+    """
+    global _listeners
+    with _listeners_lock:
+        # Copied on write, so emitting never takes the lock.
+        _listeners = _listeners + [listener]
+
+
+def remove_listener(listener):
+    global _listeners
+    with _listeners_lock:
+        _listeners = [other for other in _listeners
+                      if other is not listener]
+
+
+def enabled():
+    """
+    Whether any listener is registered.
+    """
+    return bool(_listeners)
+
+
+def emit(kind, name, fields):
+    for listener in _listeners:
+        listener(kind, name, fields)
+
+
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def endpoint(request):
+    """
+    Get the endpoint of a request path, without its query string and with
+    numeric path segments replaced by {id}:
+    '/api/v0/images/61512/regions' -> '/api/v0/images/{id}/regions'.
+    """
+    return _ID_SEGMENT.sub('/{id}', request.split('?', 1)[0])
+
+
+def timed(function):
+    """
+    Decorate `function` to emit a 'parse' event with its duration when
+    instrumentation is enabled.
+    """
+    name = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _listeners:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            emit('parse', name, {'seconds': time.perf_counter() - start})
+    return wrapper
+
+
+class Metrics:
+    """
+    Listener adding up the events it receives.
+      requests  dict of endpoint -> dict of totals: requests, seconds,
+                max_seconds, decode_seconds, bytes, retries, cache_hits,
+                revalidated, errors
+      parses    dict of function name -> dict of totals: calls, seconds,
+                max_seconds
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.parses = {}
+
+    def __call__(self, kind, name, fields):
+        seconds = fields['seconds']
+        with self.lock:
+            if kind == 'request':
+                totals = self.requests.get(name)
+                if totals is None:
+                    totals = self.requests[name] = dict.fromkeys(
+                        ('requests', 'seconds', 'max_seconds',
+                         'decode_seconds', 'bytes', 'retries', 'cache_hits',
+                         'revalidated', 'errors'), 0)
+                totals['requests'] += 1
+                totals['decode_seconds'] += fields['decode_seconds']
+                totals['bytes'] += fields['bytes']
+                totals['retries'] += fields['retries']
+                totals['cache_hits'] += fields['cache'] == 'hit'
+                totals['revalidated'] += fields['cache'] == 'revalidated'
+                totals['errors'] += fields['error'] is not None
+            elif kind == 'parse':
+                totals = self.parses.get(name)
+                if totals is None:
+                    totals = self.parses[name] = dict.fromkeys(
+                        ('calls', 'seconds', 'max_seconds'), 0)
+                totals['calls'] += 1
+            else:
+                return
+            totals['seconds'] += seconds
+            totals['max_seconds'] = max(totals['max_seconds'], seconds)
+
+    def summary(self):
+        """
+        Get a copy of the totals, as {'requests': ..., 'parses': ...}.
+        """
+        with self.lock:
+            return {'requests': {name: dict(totals) for name, totals
+                                 in self.requests.items()},
+                    'parses': {name: dict(totals) for name, totals
+                               in self.parses.items()}}
+
+    def report(self):
+        """
+        Get the totals as a table, slowest first.
+        """
+        summary = self.summary()
+        lines = ['%-40s %8s %10s %10s %12s %8s %6s %6s' % (
+            'endpoint', 'requests', 'seconds', 'decode', 'bytes', 'retries',
+            'cached', 'errors')]
+        for name, t in sorted(summary['requests'].items(),
+                              key=lambda item: -item[1]['seconds']):
+            lines.append('%-40s %8d %10.4f %10.4f %12d %8d %6d %6d' % (
+                name, t['requests'], t['seconds'], t['decode_seconds'],
+                t['bytes'], t['retries'], t['cache_hits'] + t['revalidated'],
+                t['errors']))
+        lines.append('')
+        lines.append('%-40s %8s %10s %10s' % ('parser', 'calls', 'seconds',
+                                              'max'))
+        for name, t in sorted(summary['parses'].items(),
+                              key=lambda item: -item[1]['seconds']):
+            lines.append('%-40s %8d %10.4f %10.4f' % (
+                name, t['calls'], t['seconds'], t['max_seconds']))
+        return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def collect():
+    """
+    Record the events of a block of calls into a new `Metrics`.
+    """
+    collected = Metrics()
+    add_listener(collected)
+    try:
+        yield collected
+    finally:
+        remove_listener(collected)
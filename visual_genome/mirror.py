@@ -0,0 +1,390 @@
+"""
+Visual Genome Python API wrapper, local mirror
+
+Crawls the API into the layout read by `visual_genome.local`:
+  image_data.json              every mirrored image
+  synsets.json                 synsets used by the mirrored scene graphs
+  by-id/<image id>.json        scene graphs, as `save_scene_graphs_by_id`
+                               and `add_attrs_to_scene_graphs` write them
+  regions/<image id>.json      region descriptions of one image
+  qas/<image id>.json          QAs of one image
+  region_descriptions.json     all of regions/, in image id order
+  question_answers.json        all of qas/, in image id order
+
+Every file is written atomically and progress is checkpointed, so an
+interrupted mirror picks up where it stopped. Images whose files are all
+present, or known to be missing on the server, are skipped; with
+refresh=True they are revalidated instead, using
+the ETags kept in a response cache so that only what changed on the server
+is downloaded and rewritten.
+
+    python -m visual_genome.mirror --out-dir data/ --workers 8
+"""
+import argparse
+import io
+import json
+import os
+import threading
+import visual_genome.utils as utils
+from visual_genome import api, cache, client, jsonlib
+
+KINDS = ('scene_graphs', 'regions', 'qas')
+KIND_DIRS = {'scene_graphs': 'by-id', 'regions': 'regions', 'qas': 'qas'}
+PROGRESS_FILE = '.mirror.json'
+HTTP_CACHE_FILE = '.mirror_http_cache.sqlite'
+
+
+def _write_if_changed(fname, data):
+    """
+    Write the bytes `data` to `fname` unless it already holds them; returns
+    whether the file was written.
+    """
+    if os.path.exists(fname):
+        with open(fname, 'rb') as f:
+            if f.read() == data:
+                return False
+    utils.write_atomic(fname, data)
+    return True
+
+
+def _synset_names(canon, synsets):
+    """
+    Get the names of the synsets in an API canon list, recording their
+    definitions in `synsets`.
+    """
+    names = []
+    for synset in canon:
+        synsets[synset['synset_name']] = synset['synset_definition']
+        names.append(synset['synset_name'])
+    return names
+
+
+def convert_image(data):
+    """
+    Convert an API image into an `image_data.json` record.
+    """
+    return {'image_id': data['id'] if 'id' in data else data['image_id'],
+            'url': data['url'], 'width': data['width'],
+            'height': data['height'], 'coco_id': data['coco_id'],
+            'flickr_id': data['flickr_id']}
+
+
+def convert_graph(image_id, data, synsets):
+    """
+    Convert an API scene graph into a `by-id/` record, with its attributes
+    merged in as `add_attrs_to_scene_graphs` does.
+    """
+    objects = []
+    object_map = {}
+    for box in data['bounding_boxes']:
+        names = []
+        box_synsets = []
+        for boxed in box['boxed_objects']:
+            names.append(boxed['name'])
+            box_synsets.extend(_synset_names(boxed['object_canon'], synsets))
+        obj = {'object_id': box['id'], 'x': box['x'], 'y': box['y'],
+               'w': box['width'], 'h': box['height'], 'names': names,
+               'synsets': box_synsets}
+        object_map[box['id']] = obj
+        objects.append(obj)
+    relationships = []
+    for rel in data['relationships']:
+        relationships.append({
+            'relationship_id': rel['id'], 'subject_id': rel['subject'],
+            'object_id': rel['object'], 'predicate': rel['predicate'],
+            'synsets': _synset_names(rel['relationship_canon'], synsets)})
+    attributes = []
+    for atr in data['attributes']:
+        obj = object_map.get(atr['subject'])
+        if obj is None:
+            continue
+        obj.setdefault('attributes', []).append(atr['attribute'])
+        attribute = dict(obj, attributes=[atr['attribute']],
+                         synsets=_synset_names(atr['attribute_canon'],
+                                               synsets))
+        attributes.append({'image_id': image_id, 'attribute_id': atr['id'],
+                           'attribute': attribute})
+    return {'image_id': image_id, 'objects': objects,
+            'relationships': relationships, 'attributes': attributes}
+
+
+def convert_regions(image_id, data):
+    """
+    Convert API regions into a `region_descriptions.json` record.
+    """
+    return {'id': image_id,
+            'regions': [{'region_id': r['id'], 'image_id': image_id,
+                         'phrase': r['phrase'], 'x': r['x'], 'y': r['y'],
+                         'width': r['width'], 'height': r['height']}
+                        for r in data]}
+
+
+def convert_qas(image_id, results):
+    """
+    Convert API QAs into a `question_answers.json` record.
+    """
+    qas = []
+    for qa in results:
+        qa = dict(qa)
+        qa['image_id'] = qa.pop('image', image_id)
+        qas.append(qa)
+    return {'id': image_id, 'qas': qas}
+
+
+def _fetch_qas(http, image_id):
+    results = []
+    page = 1
+    while True:
+        data = http.get_json('/api/v0/image/' + str(image_id) +
+                             '/qa?page=' + str(page))
+        if utils.is_not_found(data):
+            return None
+        results.extend(data['results'])
+        if data['next'] is None:
+            return results
+        page += 1
+
+
+class _Mirror:
+    """
+    State of one `mirror` run, shared by the threads fetching images.
+    """
+
+    def __init__(self, out_dir, kinds, refresh, http):
+        self.out_dir = out_dir
+        self.http = http
+        self.kinds = kinds
+        self.refresh = refresh
+        self.lock = threading.Lock()
+        for kind in kinds:
+            path = os.path.join(out_dir, KIND_DIRS[kind])
+            if not os.path.exists(path):
+                os.makedirs(path)
+        self.progress_file = os.path.join(out_dir, PROGRESS_FILE)
+        self.progress = {'images': {}, 'synsets': {}}
+        if os.path.exists(self.progress_file):
+            with open(self.progress_file, 'r') as f:
+                self.progress = jsonlib.load(f)
+        # image id -> kinds the API has no data for.
+        self.progress.setdefault('missing', {})
+        # Ids of images the API has no data for at all.
+        self.missing_images = set(self.progress.get('missing_images', ()))
+
+    def fname(self, kind, image_id):
+        return os.path.join(self.out_dir, KIND_DIRS[kind],
+                            str(image_id) + '.json')
+
+    def is_done(self, kind, image_id):
+        """
+        Whether `kind` of `image_id` is mirrored or known to be missing.
+        """
+        return os.path.exists(self.fname(kind, image_id)) or \
+            kind in self.progress['missing'].get(str(image_id), ())
+
+    def is_complete(self, image_id):
+        if str(image_id) in self.missing_images:
+            return True
+        return str(image_id) in self.progress['images'] and all(
+            self.is_done(kind, image_id) for kind in self.kinds)
+
+    def fetch(self, image_id):
+        """
+        Mirror one image; returns the number of files written, or None if
+        the API does not have the image.
+        """
+        synsets = {}
+        records = {}
+        missing = []
+        written = 0
+        image = self.progress['images'].get(str(image_id))
+        if image is None or self.refresh:
+            data = self.http.get_json('/api/v0/images/' + str(image_id))
+            if utils.is_not_found(data):
+                with self.lock:
+                    self.missing_images.add(str(image_id))
+                return None
+            image = convert_image(data)
+        for kind in self.kinds:
+            if self.is_done(kind, image_id) and not self.refresh:
+                continue
+            if kind == 'scene_graphs':
+                data = self.http.get_json(
+                    '/api/v0/images/' + str(image_id) + '/graph')
+                if not utils.is_not_found(data):
+                    records[kind] = convert_graph(image_id, data, synsets)
+            elif kind == 'regions':
+                data = self.http.get_json(
+                    '/api/v0/images/' + str(image_id) + '/regions')
+                if not utils.is_not_found(data):
+                    records[kind] = convert_regions(image_id, data)
+            else:
+                results = _fetch_qas(self.http, image_id)
+                if results is not None:
+                    records[kind] = convert_qas(image_id, results)
+            if kind not in records:
+                missing.append(kind)
+        for kind, record in records.items():
+            written += _write_if_changed(self.fname(kind, image_id),
+                                         json.dumps(record).encode('utf-8'))
+        with self.lock:
+            self.progress['images'][str(image_id)] = image
+            self.progress['synsets'].update(synsets)
+            self.missing_images.discard(str(image_id))
+            known = set(self.progress['missing'].pop(str(image_id), ()))
+            known.difference_update(records)
+            known.update(missing)
+            if known:
+                self.progress['missing'][str(image_id)] = sorted(known)
+        return written
+
+    def checkpoint(self):
+        with self.lock:
+            self.progress['missing_images'] = sorted(self.missing_images,
+                                                     key=int)
+            data = json.dumps(self.progress).encode('utf-8')
+        utils.write_atomic(self.progress_file, data)
+
+    def write_dumps(self):
+        """
+        Write `image_data.json`, `synsets.json` and the region and QA dumps
+        from everything mirrored so far.
+        """
+        image_ids = sorted(int(i) for i in self.progress['images'])
+        utils.write_atomic(os.path.join(self.out_dir, 'image_data.json'),
+                           json.dumps([self.progress['images'][str(i)]
+                                       for i in image_ids]).encode('utf-8'))
+        synsets = self.progress['synsets']
+        if os.path.exists(os.path.join(self.out_dir, 'synsets.json')):
+            with io.open(os.path.join(self.out_dir, 'synsets.json'), 'r',
+                         encoding='utf-8') as f:
+                for synset in jsonlib.load(f):
+                    synsets.setdefault(synset['synset_name'],
+                                       synset['synset_definition'])
+        data = json.dumps([{'synset_name': name,
+                            'synset_definition': synsets[name]}
+                           for name in sorted(synsets)]).encode('utf-8')
+        utils.write_atomic(os.path.join(self.out_dir, 'synsets.json'), data)
+        for kind, dump in (('regions', 'region_descriptions.json'),
+                           ('qas', 'question_answers.json')):
+            if kind in self.kinds:
+                self._concat(kind, image_ids, dump)
+
+    def _concat(self, kind, image_ids, dump):
+        fname = os.path.join(self.out_dir, dump)
+        with open(fname + '.tmp', 'wb') as out:
+            out.write(b'[')
+            first = True
+            for image_id in image_ids:
+                if not os.path.exists(self.fname(kind, image_id)):
+                    continue
+                if not first:
+                    out.write(b', ')
+                first = False
+                with open(self.fname(kind, image_id), 'rb') as f:
+                    out.write(f.read())
+            out.write(b']')
+        os.replace(fname + '.tmp', fname)
+
+
+def mirror(out_dir='data/', start_index=0, end_index=None, kinds=KINDS,
+           workers=8, refresh=False, checkpoint_every=500, http_cache=True,
+           verbose=False):
+    """
+    Mirror the images start_index through end_index (None for all of them)
+    into `out_dir`, fetching `workers` images at a time. Returns a dict
+    with the number of images mirrored, skipped, not found and failed and
+    of files written.
+
+    kinds : which of 'scene_graphs', 'regions' and 'qas' to mirror
+    refresh : revalidate images that are already mirrored
+    checkpoint_every : number of images between saves of the progress
+    http_cache : keep API responses with their ETags in `out_dir`, so that
+                 refreshes only download what changed; used unless the
+                 current client already has a cache
+
+    Images are fetched by a client of the mirror's own, built from the
+    base url and timeout of the current one, so that other users of
+    `utils.retrieve_data` do not go through the mirror's cache.
+    """
+    for kind in kinds:
+        if kind not in KIND_DIRS:
+            raise ValueError('Unknown kind %r, expected one of %s'
+                             % (kind, ', '.join(KINDS)))
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    current = client.get_client()
+    response_cache = current.cache
+    if http_cache and response_cache is None:
+        # Every response is revalidated; unchanged ones cost a 304.
+        response_cache = cache.ResponseCache(
+            os.path.join(out_dir, HTTP_CACHE_FILE), ttl=0)
+    http = client.Client(base_url=current.base_url, timeout=current.timeout,
+                         pool_maxsize=max(workers, 16), cache=response_cache)
+    state = _Mirror(out_dir, tuple(kinds), refresh, http)
+
+    stats = {'mirrored': 0, 'skipped': 0, 'not_found': 0, 'failed': 0,
+             'written': 0}
+
+    def pending_ids():
+        for image_id in api.iter_image_ids(start_index, end_index):
+            if not refresh and state.is_complete(image_id):
+                stats['skipped'] += 1
+            else:
+                yield image_id
+
+    try:
+        done = 0
+        for image_id, written, error in api.fetch_each(
+                lambda id: state.fetch(id), pending_ids(), workers):
+            if error is not None:
+                stats['failed'] += 1
+                if verbose:
+                    print('Failed to mirror image %s: %s' % (image_id, error))
+                continue
+            done += 1
+            if written is None:
+                stats['not_found'] += 1
+            else:
+                stats['mirrored'] += 1
+                stats['written'] += written
+            if done % checkpoint_every == 0:
+                state.checkpoint()
+                if verbose:
+                    print('Mirrored %d images, skipped %d'
+                          % (stats['mirrored'], stats['skipped']))
+        state.checkpoint()
+        state.write_dumps()
+    finally:
+        http.close()
+        if response_cache is not current.cache:
+            response_cache.close()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mirror the Visual Genome '
+                                     'API into a local data directory.')
+    parser.add_argument('--out-dir', default='data/')
+    parser.add_argument('--base-url', default=client.DEFAULT_BASE_URL)
+    parser.add_argument('--start', type=int, default=0,
+                        help='index of the first image id to mirror')
+    parser.add_argument('--end', type=int, default=None,
+                        help='index of the last image id to mirror')
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=KINDS)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--refresh', action='store_true',
+                        help='revalidate images that are already mirrored')
+    parser.add_argument('--checkpoint-every', type=int, default=500)
+    parser.add_argument('--no-http-cache', action='store_true',
+                        help='do not keep API responses for refreshes')
+    args = parser.parse_args(argv)
+
+    client.configure(base_url=args.base_url)
+    stats = mirror(args.out_dir, args.start, args.end, args.kinds,
+                   args.workers, args.refresh, args.checkpoint_every,
+                   not args.no_http_cache, verbose=True)
+    print(json.dumps(stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,8 @@
 """
 Visual Genome Python API wrapper, models
+
+Models declare `__slots__` so that instances carry no per-instance
+`__dict__`; millions of them are created when loading the whole dataset.
 """
 
 
@@ -12,6 +15,8 @@ class Image:
       height     int
     """
 
+    __slots__ = ('id', 'url', 'width', 'height', 'coco_id', 'flickr_id')
+
     def __init__(self, id, url, width, height, coco_id, flickr_id):
         self.id = id
         self.url = url
@@ -43,6 +48,8 @@ class Region:
       height           int
     """
 
+    __slots__ = ('id', 'image', 'phrase', 'x', 'y', 'width', 'height')
+
     def __init__(self, id, image, phrase, x, y, width, height):
         self.id = id
         self.image = image
@@ -63,6 +70,25 @@ class Region:
         return str(self)
 
 
+class RegionList(list):
+    """
+    List of the `Region` objects of an image.
+    """
+
+    __slots__ = ('_spatial_index',)
+
+    def spatial_index(self, rebuild=False):
+        """
+        Get a `spatial.BoxIndex` over the regions, built on first use;
+        pass rebuild=True after changing the list.
+        """
+        index = getattr(self, '_spatial_index', None)
+        if index is None or rebuild:
+            from visual_genome.spatial import BoxIndex
+            index = self._spatial_index = BoxIndex(self)
+        return index
+
+
 class Graph:
     """
     Graphs contain objects, relationships and attributes
@@ -72,11 +98,25 @@ class Graph:
       attributes       Attribute array
     """
 
+    __slots__ = ('image', 'objects', 'relationships', 'attributes',
+                 '_spatial_index')
+
     def __init__(self, image, objects, relationships, attributes):
         self.image = image
         self.objects = objects
         self.relationships = relationships
         self.attributes = attributes
+        self._spatial_index = None
+
+    def spatial_index(self, rebuild=False):
+        """
+        Get a `spatial.BoxIndex` over the objects, built on first use;
+        pass rebuild=True after changing `objects`.
+        """
+        if self._spatial_index is None or rebuild:
+            from visual_genome.spatial import BoxIndex
+            self._spatial_index = BoxIndex(self.objects)
+        return self._spatial_index
 
 
 class Object:
@@ -89,8 +129,12 @@ class Object:
       height     int
       names      string array
       synsets    Synset array
+      attributes string array, only set by the local loaders
     """
 
+    __slots__ = ('id', 'x', 'y', 'width', 'height', 'names', 'synsets',
+                 'attributes')
+
     def __init__(self, id, x, y, width, height, names, synsets):
         self.id = id
         self.x = x
@@ -117,6 +161,8 @@ class Relationship:
         rel_canon  Synset
     """
 
+    __slots__ = ('id', 'subject', 'predicate', 'object', 'synset')
+
     def __init__(self, id, subject, predicate, object, synset):
         self.id = id
         self.subject = subject
@@ -140,6 +186,8 @@ class Attribute:
       synset     Synset
     """
 
+    __slots__ = ('id', 'subject', 'attribute', 'synset')
+
     def __init__(self, id, subject, attribute, synset):
         self.id = id
         self.subject = subject
@@ -164,6 +212,8 @@ class QA:
       a_objects  QAObject array
     """
 
+    __slots__ = ('id', 'image', 'question', 'answer', 'q_objects', 'a_objects')
+
     def __init__(self, id, image, question, answer,
                  question_objects, answer_objects):
         self.id = id
@@ -192,6 +242,8 @@ class QAObject:
       synset_definition  string
     """
 
+    __slots__ = ('start_idx', 'end_idx', 'name', 'synset')
+
     def __init__(self, start_idx, end_idx, name, synset):
         self.start_idx = start_idx
         self.end_idx = end_idx
@@ -209,6 +261,8 @@ class Synset:
       definition string
     """
 
+    __slots__ = ('name', 'definition')
+
     def __init__(self, name, definition):
         self.name = name
         self.definition = definition
@@ -0,0 +1,233 @@
+"""
+Visual Genome Python API wrapper, scene graph queries
+
+An inverted index from object names and synsets, predicates and attribute
+values to the images, objects and relationships they appear in, built from
+the raw scene graph records and saved as json. Queries are conjunctions of
+patterns, each of which can be:
+  'man'                       an object with this name or synset
+  ('dog.n.01', 'brown')       an object with this name or synset and
+                              attribute
+  ('man', 'riding', 'horse')  a relationship; any of the three can be None
+Terms are matched case-insensitively. Only the scene graphs of matching
+images are ever loaded.
+"""
+import io
+import json
+import os
+import visual_genome.utils as utils
+from visual_genome import jsonlib, local
+
+
+def _term(term):
+    return term.strip().lower()
+
+
+class SceneGraphIndex:
+    """
+    Inverted index over scene graph records.
+      objects        term -> {image id: [object id]}, for names and synsets
+      attributes     attribute -> {image id: [object id]}
+      predicates     predicate -> {image id: [[relationship id, subject id,
+                     object id]]}
+    """
+
+    def __init__(self, objects=None, attributes=None, predicates=None):
+        self.objects = {} if objects is None else objects
+        self.attributes = {} if attributes is None else attributes
+        self.predicates = {} if predicates is None else predicates
+
+    def add_scene_graph(self, data):
+        """
+        Index a scene graph record, as in `scene_graphs.json` or `by-id/`.
+        Like `local.parse_graph_local`, relationships and attributes of
+        objects missing from the image are skipped.
+        """
+        image_id = data['image_id']
+        object_ids = set()
+        for obj in data['objects']:
+            oid = obj['object_id']
+            object_ids.add(oid)
+            for term in set(_term(t) for t in obj['names'] + obj['synsets']):
+                self.objects.setdefault(term, {}).setdefault(
+                    image_id, []).append(oid)
+            for value in set(_term(a) for a in obj.get('attributes', [])):
+                self.attributes.setdefault(value, {}).setdefault(
+                    image_id, []).append(oid)
+        for rel in data['relationships']:
+            sid = rel['subject_id']
+            oid = rel['object_id']
+            if sid in object_ids and oid in object_ids:
+                self.predicates.setdefault(
+                    _term(rel['predicate']), {}).setdefault(
+                    image_id, []).append([rel['relationship_id'], sid, oid])
+        for attr in data.get('attributes', []):
+            a = attr['attribute']
+            if a['object_id'] in object_ids:
+                for value in set(_term(v) for v in a['attributes']):
+                    oids = self.attributes.setdefault(value, {}).setdefault(
+                        image_id, [])
+                    if a['object_id'] not in oids:
+                        oids.append(a['object_id'])
+
+    @classmethod
+    def build(cls, image_data_dir='data/by-id/'):
+        """
+        Index the scene graph jsons saved by `local.save_scene_graphs_by_id`.
+        """
+        index = cls()
+        for image_id in local.get_scene_graph_ids(image_data_dir):
+            fname = os.path.join(image_data_dir, str(image_id) + '.json')
+            with open(fname, 'rb') as f:
+                index.add_scene_graph(jsonlib.load(f))
+        return index
+
+    @classmethod
+    def build_from_file(cls, data_dir='data/'):
+        """
+        Index `scene_graphs.json`, streaming it one scene graph at a time.
+        """
+        index = cls()
+        with io.open(os.path.join(data_dir, 'scene_graphs.json'), 'r',
+                     encoding='utf-8') as f:
+            for data in utils.iter_json_array(f):
+                index.add_scene_graph(data)
+        return index
+
+    def save(self, fname):
+        with io.open(fname, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'objects': self.objects,
+                                'attributes': self.attributes,
+                                'predicates': self.predicates},
+                               ensure_ascii=False))
+
+    @classmethod
+    def load(cls, fname):
+        with io.open(fname, 'r', encoding='utf-8') as f:
+            data = jsonlib.load(f)
+
+        # json object keys are strings, turn image ids back into ints.
+        def postings(table):
+            return {term: {int(image_id): ids
+                           for image_id, ids in images.items()}
+                    for term, images in table.items()}
+
+        return cls(postings(data['objects']), postings(data['attributes']),
+                   postings(data['predicates']))
+
+    def match_object(self, term):
+        """
+        Get {image id: [object id]} of the objects named `term`.
+        """
+        return dict(self.objects.get(_term(term), {}))
+
+    def match_attribute(self, term, attribute):
+        """
+        Get {image id: [object id]} of the objects named `term` (or any
+        object if None) that have `attribute`.
+        """
+        with_attr = self.attributes.get(_term(attribute), {})
+        if term is None:
+            return dict(with_attr)
+        named = self.objects.get(_term(term), {})
+        result = {}
+        for image_id, oids in with_attr.items():
+            if image_id in named:
+                names = set(named[image_id])
+                matched = [oid for oid in oids if oid in names]
+                if matched:
+                    result[image_id] = matched
+        return result
+
+    def match_triple(self, subject=None, predicate=None, object=None):
+        """
+        Get {image id: [relationship id]} of the relationships matching the
+        pattern; None matches anything.
+        """
+        if predicate is None:
+            predicates = list(self.predicates.values())
+        else:
+            predicates = [self.predicates.get(_term(predicate), {})]
+        subjects = None if subject is None else \
+            self.objects.get(_term(subject), {})
+        objects = None if object is None else \
+            self.objects.get(_term(object), {})
+        result = {}
+        for postings in predicates:
+            for image_id, rels in postings.items():
+                if subjects is not None and image_id not in subjects:
+                    continue
+                if objects is not None and image_id not in objects:
+                    continue
+                s_ids = None if subjects is None else set(subjects[image_id])
+                o_ids = None if objects is None else set(objects[image_id])
+                matched = [rid for rid, sid, oid in rels
+                           if (s_ids is None or sid in s_ids) and
+                           (o_ids is None or oid in o_ids)]
+                if matched:
+                    result.setdefault(image_id, []).extend(matched)
+        return result
+
+    def match(self, pattern):
+        """
+        Get {image id: [object or relationship id]} for one pattern.
+        """
+        if isinstance(pattern, str):
+            return self.match_object(pattern)
+        if len(pattern) == 1:
+            return self.match_object(pattern[0])
+        if len(pattern) == 2:
+            return self.match_attribute(*pattern)
+        if len(pattern) == 3:
+            return self.match_triple(*pattern)
+        raise ValueError('Patterns are a term, (term, attribute) or '
+                         '(subject, predicate, object): %r' % (pattern,))
+
+    def find(self, *patterns):
+        """
+        Get {image id: [matches of each pattern]} for the images matching
+        every pattern.
+        """
+        matches = [self.match(pattern) for pattern in patterns]
+        if not matches:
+            return {}
+        image_ids = set(min(matches, key=len))
+        for match in matches:
+            image_ids.intersection_update(match)
+        return {image_id: [match[image_id] for match in matches]
+                for image_id in sorted(image_ids)}
+
+    def find_images(self, *patterns):
+        """
+        Get the sorted ids of the images matching every pattern.
+        """
+        return list(self.find(*patterns))
+
+    def find_fragments(self, *patterns, **kwargs):
+        """
+        Load the scene graphs of the images matching every pattern and get
+        {image id: (objects, relationships)} with the `Object` and
+        `Relationship` models matched by the patterns. Keyword arguments
+        are passed to `local.get_scene_graph` (images, image_data_dir,
+        synset_file).
+        """
+        fragments = {}
+        for image_id, matches in self.find(*patterns).items():
+            graph = local.get_scene_graph(image_id, **kwargs)
+            object_ids = set()
+            rel_ids = set()
+            for pattern, ids in zip(patterns, matches):
+                if not isinstance(pattern, str) and len(pattern) == 3:
+                    rel_ids.update(ids)
+                else:
+                    object_ids.update(ids)
+            objects = []
+            seen = set()
+            for obj in graph.objects:
+                if obj.id in object_ids and obj.id not in seen:
+                    seen.add(obj.id)
+                    objects.append(obj)
+            relationships = [rel for rel in graph.relationships
+                             if rel.id in rel_ids]
+            fragments[image_id] = (objects, relationships)
+        return fragments
@@ -0,0 +1,181 @@
+"""
+Visual Genome Python API wrapper, spatial index
+
+A uniform grid over the boxes of one image, to find the regions or objects
+overlapping a box, containing a point or nearest to a point without
+scanning all of them. Use it through `Graph.spatial_index` and
+`RegionList.spatial_index`, or on any list of items with x, y, width and
+height.
+"""
+import heapq
+import math
+
+
+class BoxIndex:
+    """
+    Grid index over items with x, y, width and height (e.g. `Region`,
+    `Object`). Each item is registered in every cell its box overlaps.
+      items      list of indexed items
+      cell_size  float, side of a grid cell in pixels
+    """
+
+    def __init__(self, items, cell_size=None):
+        self.items = list(items)
+        if cell_size is None:
+            cell_size = self._default_cell_size(self.items)
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        self.n_cols = 0
+        self.n_rows = 0
+        for idx, item in enumerate(self.items):
+            i0, j0, i1, j1 = self._cell_range(item.x, item.y, item.width,
+                                              item.height)
+            self.n_cols = max(self.n_cols, i1 + 1)
+            self.n_rows = max(self.n_rows, j1 + 1)
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    self.cells.setdefault((i, j), []).append(idx)
+
+    @staticmethod
+    def _default_cell_size(items):
+        """
+        Cells about twice the side of the average box, so that a box only
+        spans a few cells.
+        """
+        if len(items) == 0:
+            return 1.0
+        mean_area = sum(max(it.width, 1) * max(it.height, 1)
+                        for it in items) / float(len(items))
+        return max(2 * math.sqrt(mean_area), 1.0)
+
+    def _cell(self, value):
+        return max(int(value // self.cell_size), 0)
+
+    def _cell_range(self, x, y, width, height):
+        return (self._cell(x), self._cell(y), self._cell(x + width),
+                self._cell(y + height))
+
+    def _candidates(self, x, y, width, height):
+        i0, j0, i1, j1 = self._cell_range(x, y, width, height)
+        i1 = min(i1, self.n_cols - 1)
+        j1 = min(j1, self.n_rows - 1)
+        found = set()
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                found.update(self.cells.get((i, j), ()))
+        return sorted(found)
+
+    def intersecting(self, x, y, width, height):
+        """
+        Get the items whose box overlaps the box (x, y, width, height).
+        """
+        result = []
+        for idx in self._candidates(x, y, width, height):
+            item = self.items[idx]
+            if item.x < x + width and x < item.x + item.width and \
+                    item.y < y + height and y < item.y + item.height:
+                result.append(item)
+        return result
+
+    def contained_in(self, x, y, width, height):
+        """
+        Get the items whose box lies inside the box (x, y, width, height).
+        """
+        result = []
+        for idx in self._candidates(x, y, width, height):
+            item = self.items[idx]
+            if x <= item.x and item.x + item.width <= x + width and \
+                    y <= item.y and item.y + item.height <= y + height:
+                result.append(item)
+        return result
+
+    def containing(self, x, y):
+        """
+        Get the items whose box contains the point (x, y).
+        """
+        result = []
+        for idx in self._candidates(x, y, 0, 0):
+            item = self.items[idx]
+            if item.x <= x <= item.x + item.width and \
+                    item.y <= y <= item.y + item.height:
+                result.append(item)
+        return result
+
+    def nearest(self, x, y, k=1):
+        """
+        Get the `k` items whose box is closest to the point (x, y), closest
+        first; items containing the point are at distance 0.
+
+        Rings of cells around the point are searched outwards until `k`
+        items are closer than any box outside the rings can be.
+        """
+        if k <= 0 or len(self.items) == 0:
+            return []
+        ci, cj = self._cell(x), self._cell(y)
+        max_ring = max(ci, cj, self.n_cols - 1 - ci, self.n_rows - 1 - cj, 0)
+        seen = set()
+        distances = []
+        for ring in range(max_ring + 1):
+            for i in range(ci - ring, ci + ring + 1):
+                for j in range(cj - ring, cj + ring + 1):
+                    if max(abs(i - ci), abs(j - cj)) != ring:
+                        continue
+                    for idx in self.cells.get((i, j), ()):
+                        if idx not in seen:
+                            seen.add(idx)
+                            distances.append((self._distance(idx, x, y), idx))
+            # Any box not seen yet lies outside the searched square.
+            reach = ring * self.cell_size
+            closest = heapq.nsmallest(k, distances)
+            if len(closest) == k and closest[-1][0] <= reach:
+                break
+        return [self.items[idx] for _, idx in heapq.nsmallest(k, distances)]
+
+    def _distance(self, idx, x, y):
+        item = self.items[idx]
+        dx = max(item.x - x, 0, x - (item.x + item.width))
+        dy = max(item.y - y, 0, y - (item.y + item.height))
+        return math.sqrt(dx * dx + dy * dy)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _as_boxes(items):
+    """
+    Turn a list of items with x, y, width and height into (n, 4) rows;
+    arrays and lists of rows are returned as they are.
+    """
+    if len(items) and hasattr(items[0], 'width'):
+        return [[it.x, it.y, it.width, it.height] for it in items]
+    return items
+
+
+def match_boxes(boxes_a, boxes_b, threshold=0.5):
+    """
+    Greedily match two sets of boxes one to one by decreasing intersection
+    over union, keeping pairs with an IoU of at least `threshold`.
+
+    Boxes can be lists of `Region` / `Object`, arrays from
+    `visual_genome.arrays` or (n, 4) x, y, width, height rows. Returns a
+    list of (index in boxes_a, index in boxes_b, iou). Requires numpy.
+    """
+    from visual_genome import arrays
+    np = arrays.np
+    arrays.require_numpy(__name__)
+    a = _as_boxes(boxes_a)
+    b = _as_boxes(boxes_b)
+    if len(a) == 0 or len(b) == 0:
+        return []
+    iou = arrays.box_iou(a, b)
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind='stable')
+    used_a = set()
+    used_b = set()
+    matches = []
+    for i, j in zip(rows[order].tolist(), cols[order].tolist()):
+        if i not in used_a and j not in used_b:
+            used_a.add(i)
+            used_b.add(j)
+            matches.append((i, j, float(iou[i, j])))
+    return matches
@@ -1,9 +1,12 @@
 
 import json
-import requests
+import os
+import re
 from os.path import dirname, realpath, join
+from visual_genome import client, jsonlib, metrics
 from visual_genome.models import (Image, Object, Attribute, Relationship,
-                                  Region, Graph, QA, QAObject, Synset)
+                                  Region, RegionList, Graph, QA, QAObject,
+                                  Synset)
 
 
 def get_data_dir():
@@ -17,17 +20,135 @@ def get_data_dir():
 def retrieve_data(request):
     """
     Helper Method used to get all data from request string.
+
+    Requests go through the pooled client of `visual_genome.client`; use
+    `client.configure` to change its base url, timeouts or retries.
+    """
+    return client.get_client().get_json(request)
+
+
+def is_not_found(data):
+    """
+    Whether `data` is the API's answer for something it does not have.
+    """
+    return isinstance(data, dict) and data.get('detail') == 'Not found.'
+
+
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _scan_json_array(read, chunk_size, base=0, resume=False):
+    """
+    Incrementally decode a top-level JSON array from the `read` callable.
+
+    Yields (start, end, text, value) for every element, where start and end
+    are the offsets of the element `text` in the stream. Only the element
+    being decoded and at most one pending chunk are buffered at any time.
+
+    With `resume`, the stream starts right after an element that ended at
+    offset `base`, rather than at the beginning of the array.
+    """
+    decoder = json.JSONDecoder()
+    buf = read(chunk_size)
+    pos = 0
+    eof = not buf
+    opened = resume
+    # One of 'first' (after '['), 'value' (after ',') or 'separator'.
+    expect = 'separator' if resume else 'first'
+    while True:
+        pos = _JSON_WHITESPACE.match(buf, pos).end()
+        if pos < len(buf):
+            char = buf[pos]
+            if not opened:
+                if char != '[':
+                    raise ValueError('Expected a JSON array at offset %d'
+                                     % (base + pos))
+                opened = True
+                pos += 1
+                continue
+            if char == ']':
+                if expect == 'value':
+                    raise ValueError('Trailing "," at offset %d'
+                                     % (base + pos))
+                return
+            if expect == 'separator':
+                if char != ',':
+                    raise ValueError('Expected "," or "]" at offset %d'
+                                     % (base + pos))
+                expect = 'value'
+                pos += 1
+                continue
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+                end = None
+            if end is not None:
+                # Only accept the value once its delimiter has been read: a
+                # number split across two chunks also decodes successfully.
+                after = _JSON_WHITESPACE.match(buf, end).end()
+                if eof or (after < len(buf) and buf[after] in ',]'):
+                    yield base + pos, base + end, buf[pos:end], value
+                    pos = end
+                    expect = 'separator'
+                    continue
+        elif eof:
+            raise ValueError('Unexpected end of JSON array')
+        # Drop everything already consumed and read at least as much as we
+        # are holding, so that retrying a large element stays linear.
+        buf = buf[pos:]
+        base += pos
+        pos = 0
+        chunk = read(max(chunk_size, len(buf)))
+        eof = not chunk
+        buf += chunk
+
+
+def iter_json_array(f, chunk_size=2 ** 20):
+    """
+    Iterate over the elements of a JSON array stored in the text file `f`
+    without loading the whole file in memory.
+    """
+    for _, _, _, value in _scan_json_array(f.read, chunk_size):
+        yield value
+
+
+def iter_json_array_records(f, offset=0, chunk_size=2 ** 20):
+    """
+    Iterate over the elements of a JSON array stored in the binary file `f`,
+    yielding (start, end, raw, value) for each: its byte offsets in the
+    file, its raw bytes and its decoded value.
+
+    If `offset` is not 0 it must be the `end` of a previously yielded
+    element, and iteration resumes after it.
+    """
+    f.seek(offset)
+
+    # latin-1 maps every byte to one character, so offsets are byte offsets.
+    def read(size):
+        return f.read(size).decode('latin-1')
+
+    for start, end, text, value in _scan_json_array(read, chunk_size, offset,
+                                                    offset != 0):
+        raw = text.encode('latin-1')
+        if not raw.isascii():
+            # Strings were decoded byte by byte, decode them again as UTF-8.
+            value = jsonlib.loads(raw)
+        yield start, end, raw, value
+
+
+def write_atomic(fname, data):
+    """
+    Write the bytes `data` to `fname` so that it is never seen half written.
     """
-    url = 'http://visualgenome.org'
-    data = requests.get(url + request).json()
-    # connection = httplib.HTTPSConnection("visualgenome.org", '443')
-    # connection.request("GET", request)
-    # response = connection.getresponse()
-    # jsonString = response.read()
-    # data = json.loads(json_string)
-    return data
+    tmp_fname = fname + '.tmp'
+    with open(tmp_fname, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_fname, fname)
 
 
+@metrics.timed
 def parse_synset(canon):
     """
     Helper to Extract Synset from canon object.
@@ -37,6 +158,7 @@ def parse_synset(canon):
     return Synset(canon[0]['synset_name'], canon[0]['synset_definition'])
 
 
+@metrics.timed
 def parse_graph(data, image):
     """
     Helper to parse a Graph object from API data.
@@ -72,6 +194,7 @@ def parse_graph(data, image):
     return Graph(image, objects, relationships, attributes)
 
 
+@metrics.timed
 def parse_image_data(data):
     """
     Helper to parse the image data for one image.
@@ -86,11 +209,14 @@ def parse_image_data(data):
     return image
 
 
+@metrics.timed
 def parse_region_descriptions(data, image):
     """
     Helper to parse region descriptions.
     """
-    regions = []
+    regions = RegionList()
+    if not data:
+        return regions
     if 'region_id' in data[0]:
         region_id_key = 'region_id'
     else:
@@ -102,6 +228,7 @@ def parse_region_descriptions(data, image):
     return regions
 
 
+@metrics.timed
 def parse_QA(data, image_map):
     """
     Helper to parse a list of question answers.